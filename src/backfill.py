@@ -0,0 +1,101 @@
+import argparse
+import glob
+
+from shibuya.backfill import plan_playlists, unique_albums, warm_albums
+from shibuya.cli import add_api_arguments, check_rates, create_clients, create_policies, create_stats
+from shibuya.resolution_index import ResolutionIndex
+from shibuya.schedule_store import ScheduleStore
+from shibuya.search_cache import SearchCache
+from shibuya.upload import default_playlist_name, dry_run_albums, upload_albums
+
+DEFAULT_PATTERN = 'data/*.csv'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build a playlist for every month in a set of schedule files')
+    parser.add_argument('patterns', nargs='*', default=[DEFAULT_PATTERN],
+                        help=f'Schedule files or glob patterns (default: {DEFAULT_PATTERN})')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Resolve the albums and show the plan without creating playlists')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue interrupted uploads instead of starting new playlists')
+    add_api_arguments(parser)
+    args = parser.parse_args()
+    check_rates(parser, args)
+
+    files = sorted({path for pattern in args.patterns for path in glob.glob(pattern)})
+    if not files:
+        parser.error(f"No schedule files match {' '.join(args.patterns)}")
+
+    # Months and their newest scrapes come from the schedule store, as in the uploader's --month
+    store = ScheduleStore()
+    plan = plan_playlists(store, files)
+    print(f"{len(files)} files → {len(plan)} playlists")
+    for month_year, path, superseded in plan:
+        note = f" (replaces {', '.join(superseded)})" if superseded else ""
+        print(f"  {month_year:<15} {path}{note}")
+
+    # One set of clients, cache, index and rate limit for every playlist
+    cache = SearchCache(backend=args.cache_backend)
+    index = ResolutionIndex()
+    results = []
+    stats = create_stats(args)
+    policies = {}
+    try:
+        rows = (row for month_year, _, _ in plan for row in store.month_rows(month_year, paths=files))
+        todo, distinct, row_count = unique_albums(rows, index, cache)
+        print(f"\n{row_count} rows, {distinct} distinct albums, {len(todo)} to look up")
+
+        # Lookups use an app token; the user's login is only needed to create playlists
+        read_sp, sp = create_clients(writing=not args.dry_run, stats=stats)
+        if read_sp is None:
+            return
+        read_policy, policy = create_policies(args.rate, args.read_rate, writing=not args.dry_run,
+                                              quiet=args.dry_run)
+        policies.update(read=read_policy, write=policy)
+
+        # Look every distinct album up once; the playlists below are then
+        # built from the index without searching again
+        if todo:
+            print(f"\n== Resolving {len(todo)} albums ==")
+            warmed = warm_albums(read_sp, todo, cache, index, read_policy, workers=args.workers,
+                                 skip_tracks=args.dry_run, dry_run=args.dry_run)
+            for i, (album, ok) in enumerate(warmed, 1):
+                album_name = album['album'][:40].ljust(40)
+                artist_name = album['artist'][:20].ljust(20)
+                print(f"[{i:3d}/{len(todo)}] {album_name} {artist_name} {'✓' if ok else '✗'}")
+
+        for n, (month_year, path, _) in enumerate(plan, 1):
+            playlist_name = default_playlist_name(month_year)
+            print(f"\n{'#'*70}\n[{n}/{len(plan)}] {playlist_name} ← {path}\n")
+            rows = store.month_rows(month_year, paths=files)
+            if args.dry_run:
+                ok = dry_run_albums(read_sp, rows, playlist_name, cache, index, read_policy,
+                                    workers=args.workers, rate=read_policy.limiter.max_rate)
+            else:
+                ok = upload_albums(sp, rows, path, playlist_name, month_year, cache, index, policy,
+                                   workers=args.workers, resume=args.resume, read_sp=read_sp,
+                                   read_policy=read_policy)
+            results.append((playlist_name, ok))
+    except KeyboardInterrupt:
+        print("\nStopped. Finished playlists are kept; run again with --resume to continue.")
+    finally:
+        if stats is not None:
+            stats.report(policies, cache, index, show=args.stats)
+        cache.close()
+        index.close()
+        store.close()
+
+    if results:
+        print(f"\n{'='*70}")
+        used = [policy for policy in policies.values() if policy is not None]
+        retries = sum(policy.retries for policy in used)
+        waited = sum(policy.limiter.waited for policy in used)
+        print(f"Backfill: {sum(ok for _, ok in results)}/{len(plan)} playlists complete "
+              f"({retries} retries, {waited:.0f}s waiting on the rate limit)")
+        for playlist_name, ok in results:
+            print(f"  {'✓' if ok else '✗'} {playlist_name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+import argparse
+import contextlib
+import glob
+import io
+import json
+import logging
+import os
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from shibuya.cli import create_policies
+from shibuya.fake_spotify import FakeSpotifyServer
+from shibuya.instrumentation import percentile
+from shibuya.resolution_index import ResolutionIndex
+from shibuya.schedule import iter_playlist_data
+from shibuya.search_cache import SearchCache, BACKENDS
+from shibuya.upload import default_playlist_name, playlist_month_year, upload_albums
+
+DEFAULT_PATTERN = 'data/*.csv'
+
+
+def record_latencies(sp):
+    """Collect the time to response headers of every request the client sends"""
+    latencies = []
+    lock = threading.Lock()
+
+    def hook(response, *args, **kwargs):
+        with lock:
+            latencies.append(response.elapsed.total_seconds())
+
+    sp._session.hooks['response'].append(hook)
+    return latencies
+
+
+def run_pass(server, sp, read_sp, files, cache, index, args):
+    """Upload every file once against the fake server and measure the run"""
+    read_policy, policy = create_policies(args.rate, quiet=True)
+    latencies = record_latencies(sp)
+    read_sp._session.hooks['response'].append(sp._session.hooks['response'][-1])
+    calls_before = server.calls.copy()
+    hits_before = index.hits + cache.hits
+    misses_before = cache.misses
+    rows = 0
+    complete = 0
+    started = time.monotonic()
+    for path in files:
+        schedule = list(iter_playlist_data(path))
+        schedule = [row for row in schedule if row.get('artist') and row.get('album')]
+        if not schedule:
+            continue
+        rows += len(schedule)
+        month_year = playlist_month_year(schedule[0])
+        with contextlib.redirect_stdout(io.StringIO()):
+            ok = upload_albums(sp, schedule, path, default_playlist_name(month_year), month_year, cache, index,
+                               policy, workers=args.workers, read_sp=read_sp, read_policy=read_policy)
+        complete += ok
+    elapsed = time.monotonic() - started
+    sp._session.hooks['response'].clear()
+    read_sp._session.hooks['response'].clear()
+
+    calls = server.calls - calls_before
+    hits = index.hits + cache.hits - hits_before
+    misses = cache.misses - misses_before
+    return {
+        'files': len(files),
+        'complete': complete,
+        'albums': rows,
+        'seconds': round(elapsed, 2),
+        'albums_per_sec': round(rows / elapsed, 2) if elapsed else 0.0,
+        'calls': sum(calls.values()),
+        'calls_per_album': round(sum(calls.values()) / rows, 3) if rows else 0.0,
+        'calls_by_endpoint': {endpoint: round(count / rows, 3) for endpoint, count in sorted(calls.items())},
+        'cache_hit_rate': round(hits / (hits + misses), 3) if hits + misses else 0.0,
+        'latency_p50_ms': round(percentile(latencies, 50) * 1000, 1),
+        'latency_p95_ms': round(percentile(latencies, 95) * 1000, 1),
+        'latency_mean_ms': round(statistics.mean(latencies) * 1000, 1) if latencies else 0.0,
+        'retries': policy.retries + read_policy.retries,
+        'rate_limit_wait': round(policy.limiter.waited + read_policy.limiter.waited, 2),
+    }
+
+
+def print_pass(n, result):
+    print(f"\n== Pass {n}: {result['files']} files, {result['albums']} albums "
+          f"({result['complete']}/{result['files']} playlists complete) ==")
+    print(f"  {result['albums_per_sec']:8.2f} albums/sec ({result['seconds']}s)")
+    print(f"  {result['calls_per_album']:8.3f} calls/album ({result['calls']} calls)")
+    for endpoint, per_album in result['calls_by_endpoint'].items():
+        print(f"           {per_album:8.3f} {endpoint}")
+    print(f"  {result['cache_hit_rate']:8.1%} cache hit rate")
+    print(f"  {result['latency_p50_ms']:8.1f} ms p50, {result['latency_p95_ms']:.1f} ms p95 per request")
+    print(f"  {result['retries']:8d} retries, {result['rate_limit_wait']}s waiting on the rate limit")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Replay schedules through the search and upload path against a local fake Spotify API')
+    parser.add_argument('patterns', nargs='*', default=[DEFAULT_PATTERN],
+                        help=f'Schedule files or glob patterns (default: {DEFAULT_PATTERN})')
+    parser.add_argument('--passes', type=int, default=2,
+                        help='Times to replay the schedules; later passes run against a warm cache (default: 2)')
+    parser.add_argument('--latency-ms', type=float, default=30.0,
+                        help='Added latency of every fake API response (default: 30)')
+    parser.add_argument('--jitter-ms', type=float, default=10.0,
+                        help='Random +/- variation of that latency (default: 10)')
+    parser.add_argument('--rate-limit', type=float, default=0.0,
+                        help='Fraction of requests answered with 429 (default: 0)')
+    parser.add_argument('--retry-after', type=int, default=1,
+                        help='Retry-After seconds sent with each 429 (default: 1)')
+    parser.add_argument('--error-bursts', type=float, default=0.0,
+                        help='Chance a request starts a burst of 503s (default: 0)')
+    parser.add_argument('--burst-length', type=int, default=3,
+                        help='Number of 503s in each burst (default: 3)')
+    parser.add_argument('--miss-rate', type=float, default=0.05,
+                        help='Fraction of searches that find nothing (default: 0.05)')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the injected faults (default: 0)')
+    parser.add_argument('--cache-backend', choices=sorted(BACKENDS), default='log',
+                        help='Storage backend for the search cache (default: log)')
+    parser.add_argument('--rate', type=float, default=100.0,
+                        help='Client-side limit on requests per second, split between reads and writes '
+                             '(default: 100)')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='Number of concurrent album searches (default: 4)')
+    parser.add_argument('--json', metavar='FILE', help='Also write the results as JSON to FILE')
+    args = parser.parse_args()
+
+    files = sorted({str(Path(path).resolve()) for pattern in args.patterns for path in glob.glob(pattern)})
+    if not files:
+        parser.error(f"No schedule files match {' '.join(args.patterns)}")
+    json_path = Path(args.json).resolve() if args.json else None
+    # spotipy logs every 429 and 5xx it sees; the injected ones are expected here
+    logging.getLogger('spotipy').setLevel(logging.CRITICAL)
+
+    server = FakeSpotifyServer(latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000,
+                               rate_limit_rate=args.rate_limit, retry_after=args.retry_after,
+                               error_burst_rate=args.error_bursts, burst_length=args.burst_length,
+                               miss_rate=args.miss_rate, seed=args.seed).start()
+    print(f"Fake Spotify API at {server.url}")
+    print(f"{len(files)} files, {args.passes} passes, {args.workers} workers, {args.rate:g} req/s")
+
+    # Cache, index and journals live in a scratch directory so the real ones are never touched
+    cwd = os.getcwd()
+    results = []
+    with tempfile.TemporaryDirectory(prefix='shibuya-bench-') as scratch:
+        os.chdir(scratch)
+        cache = SearchCache(backend=args.cache_backend)
+        index = ResolutionIndex()
+        try:
+            # Separate clients for playlist writes and lookups, as in a real run
+            sp = server.client()
+            read_sp = server.client()
+            for n in range(1, args.passes + 1):
+                result = run_pass(server, sp, read_sp, files, cache, index, args)
+                results.append(result)
+                print_pass(n, result)
+        except KeyboardInterrupt:
+            print("\nStopped.")
+        finally:
+            cache.close()
+            index.close()
+            server.stop()
+            os.chdir(cwd)
+
+    print(f"\nServer responses: {dict(sorted(server.statuses.items()))}")
+    if json_path is not None:
+        report = {'config': {key: value for key, value in vars(args).items() if key not in ('patterns', 'json')},
+                  'files': files, 'passes': results}
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"✓ Results written to {json_path}")
+
+
+if __name__ == "__main__":
+    main()
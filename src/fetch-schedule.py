@@ -0,0 +1,40 @@
+import argparse
+import sys
+import time
+
+from shibuya.fetch import MAX_PAGES, SCHEDULE_URL, ConditionalFetcher, FetchError, fetch_schedule
+from shibuya.schedule_parser import HOSTED_RE, html_to_lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Download the Shibuya Hi-Fi schedule, following its Load More pages')
+    parser.add_argument('--url', default=SCHEDULE_URL, help=f'Schedule page (default: {SCHEDULE_URL})')
+    parser.add_argument('--output', default='tmp/shibuya-schedule-rendered.html', help='HTML file to write')
+    parser.add_argument('--max-pages', type=int, default=MAX_PAGES,
+                        help=f'Stop after this many pages (default: {MAX_PAGES})')
+    args = parser.parse_args()
+
+    start = time.monotonic()
+    fetcher = ConditionalFetcher()
+    try:
+        html, pages = fetch_schedule(args.url, fetcher, args.max_pages)
+    except FetchError as e:
+        print(f"✗ {e}", file=sys.stderr)
+        sys.exit(1)
+    fetcher.save()
+
+    # Without the sessions the page is probably rendered client-side; let
+    # the caller fall back to the headless browser
+    sessions = sum(1 for line in html_to_lines(html) if HOSTED_RE.match(line))
+    if not sessions:
+        print("✗ Downloaded the page but found no sessions in it", file=sys.stderr)
+        sys.exit(2)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        f.write(html)
+    print(f"✓ Saved {pages} pages ({sessions} sessions, {fetcher.not_modified} unchanged) to {args.output} "
+          f"in {time.monotonic() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
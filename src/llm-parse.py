@@ -0,0 +1,58 @@
+import argparse
+import sys
+
+from shibuya.llm_parse import (DEFAULT_MODEL, LLMCache, LLMError, build_prompt, extract_chunks, merge_csvs,
+                               month_chunks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Extract the schedule CSV from page text with an LLM, caching by content')
+    parser.add_argument('text_file', help='Schedule page converted to text (html2text output)')
+    parser.add_argument('--system-prompt', help='System prompt, with month and year filled in (default: the built-in prompt)')
+    parser.add_argument('--month', required=True, help='Target month (e.g. June)')
+    parser.add_argument('--year', required=True, help='Target year (e.g. 2026)')
+    parser.add_argument('--model', default=DEFAULT_MODEL, help=f'llm model name (default: {DEFAULT_MODEL})')
+    parser.add_argument('--output', required=True, help='CSV file to write')
+    parser.add_argument('--raw-output', help='Also save the full model response here')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Always call the model, replacing any cached answer')
+    parser.add_argument('--days-per-chunk', type=int, default=1,
+                        help='Play days sent to the model per request (default: 1)')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='Number of concurrent model requests (default: 4)')
+    args = parser.parse_args()
+
+    with open(args.text_file, 'r', encoding='utf-8', errors='replace') as f:
+        text = f.read()
+
+    system_prompt = args.system_prompt or build_prompt(args.month, args.year)
+    chunks = month_chunks(text, args.month, args.year, max(1, args.days_per_chunk))
+    if chunks is None:
+        print("No date lines recognised, sending the whole page to the model", file=sys.stderr)
+        chunks = [text]
+    else:
+        kept = sum(len(chunk) for chunk in chunks)
+        print(f"Kept {kept:,} of {len(text):,} characters dated {args.month} {args.year}, "
+              f"in {len(chunks)} chunks", file=sys.stderr)
+
+    try:
+        csv_texts, responses, cached = extract_chunks(chunks, system_prompt, args.month, args.year,
+                                                      args.model, LLMCache(), args.workers,
+                                                      refresh=args.no_cache)
+    except LLMError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+    if cached:
+        print(f"Used cached LLM results for {cached}/{len(chunks)} chunks (pass --no-cache to call the model)",
+              file=sys.stderr)
+
+    if args.raw_output and responses:
+        with open(args.raw_output, 'w', encoding='utf-8') as f:
+            f.write('\n\n'.join(responses))
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        f.write(merge_csvs(csv_texts))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import argparse
+import glob
+
+from shibuya.backfill import plan_playlists, unique_albums, warm_albums
+from shibuya.cli import add_api_arguments, check_rates, create_clients, create_policies
+from shibuya.master_playlist import MASTER_NAME, MasterPlaylist
+from shibuya.resolution_index import ResolutionIndex
+from shibuya.retry import RetriesExhausted
+from shibuya.schedule_store import ScheduleStore
+from shibuya.search_cache import SearchCache
+
+DEFAULT_PATTERN = 'data/*.csv'
+
+
+def iter_scheduled_albums(store, plan):
+    """Yield every row of every scrape of every month, oldest month first"""
+    for _, path, superseded in plan:
+        for source in superseded + [path]:
+            yield from store.source_rows(source)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Add every album ever scheduled to one cumulative playlist')
+    parser.add_argument('patterns', nargs='*', default=[DEFAULT_PATTERN],
+                        help=f'Schedule files or glob patterns (default: {DEFAULT_PATTERN})')
+    parser.add_argument('--name', default=MASTER_NAME, help=f'Playlist name (default: {MASTER_NAME})')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Show what would be added without creating or changing playlists')
+    add_api_arguments(parser, stats=False)
+    args = parser.parse_args()
+    check_rates(parser, args)
+
+    files = sorted({path for pattern in args.patterns for path in glob.glob(pattern)})
+    if not files:
+        parser.error(f"No schedule files match {' '.join(args.patterns)}")
+    store = ScheduleStore()
+    plan = plan_playlists(store, files)
+
+    cache = SearchCache(backend=args.cache_backend)
+    index = ResolutionIndex()
+    try:
+        todo, distinct, row_count = unique_albums(iter_scheduled_albums(store, plan), index, cache)
+        print(f"{len(files)} files, {row_count} rows, {distinct} distinct albums, {len(todo)} to look up")
+
+        # Lookups use an app token; the user's login is only needed to change the playlist
+        read_sp, sp = create_clients(writing=not args.dry_run)
+        if read_sp is None:
+            return
+        read_policy, policy = create_policies(args.rate, args.read_rate, writing=not args.dry_run,
+                                              quiet=args.dry_run)
+        master = MasterPlaylist(sp, policy, name=args.name)
+        print(f"'{args.name}': {len(master.albums)} albums in {len(master.parts)} parts\n")
+
+        if todo:
+            warmed = warm_albums(read_sp, todo, cache, index, read_policy, workers=args.workers,
+                                 skip_tracks=args.dry_run, dry_run=args.dry_run)
+            for i, (album, ok) in enumerate(warmed, 1):
+                album_name = album['album'][:40].ljust(40)
+                artist_name = album['artist'][:20].ljust(20)
+                print(f"[{i:3d}/{len(todo)}] {album_name} {artist_name} {'✓' if ok else '✗'}")
+
+        # Everything is in the index now; adding albums costs only playlist writes
+        new_albums = 0
+        new_tracks = 0
+        missing = []
+        for row in iter_scheduled_albums(store, plan):
+            found = index.lookup(row['artist'], row['album'])
+            if not found or master.contains(found[0]['id']):
+                continue
+            album_id = found[0]['id']
+            uris = index.tracks(album_id)
+            if args.dry_run:
+                master.queued.add(album_id)
+                new_albums += 1
+                new_tracks += len(uris) if uris is not None else found[0].get('total_tracks', 0)
+                print(f"  + {row['album']} by {row['artist']}")
+            elif uris is None:
+                missing.append((row['album'], row['artist']))
+            else:
+                master.add(album_id, uris, row['album'], row['artist'])
+        if not args.dry_run:
+            master.flush()
+
+        print(f"\n{'='*70}")
+        if args.dry_run:
+            print(f"Dry run: would add {new_albums} albums (~{new_tracks} tracks)")
+        else:
+            print(f"Added {master.added} albums"
+                  + (f", created {master.created} new parts" if master.created else ""))
+            for part in master.parts:
+                print(f"  {part['name']}: {part['tracks']} tracks  https://open.spotify.com/playlist/{part['id']}")
+            if master.too_long:
+                print(f"\nToo long for one part ({master.max_tracks} tracks), not added:")
+                for album_name, artist_name, track_count in master.too_long:
+                    print(f"  • {album_name} by {artist_name} ({track_count} tracks)")
+            failed = master.failed + missing
+            if failed:
+                print(f"\nNot added (retried next run):")
+                for album_name, artist_name in failed:
+                    print(f"  • {album_name} by {artist_name}")
+    except RetriesExhausted as e:
+        print(f"ERROR: Could not create playlist: {e}")
+    except KeyboardInterrupt:
+        print("\nStopped. Albums already written are recorded; run again to continue.")
+    finally:
+        cache.close()
+        index.close()
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+import argparse
+import sys
+
+from shibuya.schedule_parser import ScheduleParseError, parse_schedule_html, write_schedule_csv
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Parse the rendered Shibuya Hi-Fi schedule page into a CSV')
+    parser.add_argument('html_file', help='Rendered schedule HTML')
+    parser.add_argument('--month', help='Only keep sessions in this month (full name, e.g. June)')
+    parser.add_argument('--year', type=int, help='Only keep sessions in this year; also used for dates without one')
+    parser.add_argument('--output', help='CSV file to write (default: stdout)')
+    args = parser.parse_args()
+
+    with open(args.html_file, 'r', encoding='utf-8', errors='replace') as f:
+        html = f.read()
+
+    try:
+        rows = parse_schedule_html(html, month=args.month, year=args.year)
+    except ScheduleParseError as e:
+        print(f"Could not parse schedule: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.output:
+        with open(args.output, 'w', newline='') as f:
+            write_schedule_csv(rows, f)
+        print(f"Wrote {len(rows)} sessions to {args.output}", file=sys.stderr)
+    else:
+        write_schedule_csv(rows, sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
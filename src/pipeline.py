@@ -0,0 +1,130 @@
+import argparse
+import sys
+from datetime import datetime
+
+from shibuya.cli import add_api_arguments, check_rates, create_clients, create_policies, create_stats
+from shibuya.llm_parse import DEFAULT_MODEL
+from shibuya.pipeline import (DATA_DIR, MONTHS, PipelineError, StageTimer, fetch_html, parse_html, save_csv,
+                              validate_rows)
+from shibuya.resolution_index import ResolutionIndex
+from shibuya.schedule import iter_playlist_data, peek
+from shibuya.search_cache import SearchCache
+from shibuya.upload import default_playlist_name, dry_run_albums, playlist_month_year, upload_albums
+
+
+def year_arg(value):
+    year = int(value)
+    if not 2020 <= year <= 2030:
+        raise argparse.ArgumentTypeError("use a 4-digit year between 2020-2030")
+    return year
+
+
+def run(args, timer):
+    """
+    Run the stages in one process; returns True on success. Rows stream
+    from the parser (or CSV) through validation and into the resolver, so
+    the first searches start while later rows are still being produced.
+    """
+    if args.csv_file:
+        print(f"Using local CSV file: {args.csv_file}")
+        rows = timer.wrap('load', iter_playlist_data(args.csv_file))
+        csv_path = args.csv_file
+        journal_key = None
+    else:
+        with timer.stage('fetch'):
+            html = fetch_html(args.html_file)
+        csv_path = DATA_DIR / f"shibuya-schedule-{args.month}-{args.year}-{datetime.now():%Y-%m-%d}.csv"
+        # Each fetch saves a newly dated CSV, so --resume on a later day goes by the month instead
+        journal_key = f"shibuya-schedule-{args.month}-{args.year}"
+        # Parsed and saved in the background; time spent waiting on it is parsing
+        rows = timer.wrap('parse', save_csv(parse_html(html, args.month, args.year, model=args.model,
+                                                       use_llm_cache=not args.no_llm_cache), csv_path))
+    rows = timer.wrap('validate', validate_rows(rows))
+
+    if args.parse_only:
+        with timer.stage('write csv'):
+            count = sum(1 for _ in rows)
+        print(f"✓ {count} rows")
+        return True
+
+    first_row, rows = peek(rows)
+    if first_row is None:
+        print("WARNING: No albums found. This might be normal if none are scheduled for that month.")
+        return True
+
+    cache = SearchCache(backend=args.cache_backend)
+    index = ResolutionIndex()
+    stats = create_stats(args)
+    policies = {}
+    try:
+        with timer.stage('resolve/upload'):
+            # Searches use an app token; the user's login is only needed to write the playlist
+            read_sp, sp = create_clients(writing=not args.dry_run, stats=stats)
+            if read_sp is None:
+                return False
+            read_policy, policy = create_policies(args.rate, args.read_rate, writing=not args.dry_run,
+                                                  quiet=args.dry_run)
+            policies.update(read=read_policy, write=policy)
+            # --month/--year name the playlist; a CSV on its own is named after its first row
+            month_year = args.month_year or playlist_month_year(first_row)
+            playlist_name = args.playlist_name or default_playlist_name(month_year)
+            if args.dry_run:
+                return dry_run_albums(read_sp, rows, playlist_name, cache, index, read_policy,
+                                      workers=args.workers, rate=read_policy.limiter.max_rate)
+            return upload_albums(sp, rows, str(csv_path), playlist_name, month_year, cache, index, policy,
+                                 workers=args.workers, resume=args.resume, read_sp=read_sp, read_policy=read_policy,
+                                 journal_key=journal_key)
+    finally:
+        if stats is not None:
+            stats.report(policies, cache, index, show=args.stats)
+        cache.close()
+        index.close()
+
+
+def main():
+    now = datetime.now()
+    parser = argparse.ArgumentParser(description='Fetch the Shibuya Hi-Fi schedule and turn it into a Spotify playlist')
+    parser.add_argument('--month', choices=MONTHS,
+                        help='Target month, full name (default: current month, or the CSV\'s month with --csv-file)')
+    parser.add_argument('--year', type=year_arg,
+                        help='Target year (default: current year, or the CSV\'s year with --csv-file)')
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--html-file', help='Use a local HTML file instead of downloading')
+    source.add_argument('--csv-file', help='Create the playlist directly from a CSV file (skips all parsing)')
+    parser.add_argument('--parse-only', action='store_true',
+                        help='Stop after writing the CSV to data/')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Search Spotify without creating the playlist or adding tracks')
+    parser.add_argument('--playlist-name', help='Name for the playlist (default: month-based name)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue an interrupted upload of the same CSV into the same playlist')
+    parser.add_argument('--no-llm-cache', action='store_true',
+                        help='Call the LLM even if identical input was parsed before')
+    parser.add_argument('--model', default=DEFAULT_MODEL, help=f'LLM used as a fallback parser (default: {DEFAULT_MODEL})')
+    add_api_arguments(parser)
+    args = parser.parse_args()
+    check_rates(parser, args)
+    named = args.month is not None or args.year is not None
+    args.month = args.month or now.strftime('%B')
+    args.year = args.year or now.year
+    args.month_year = f"{args.month} {args.year}" if named or not args.csv_file else None
+
+    print(f"Shibuya Hi-Fi playlist for {args.month_year or args.csv_file}")
+    timer = StageTimer()
+    try:
+        ok = run(args, timer)
+    except PipelineError as e:
+        print(f"ERROR: {e}")
+        ok = False
+    except (OSError, ValueError) as e:
+        print(f"Error loading playlist data: {e}")
+        ok = False
+    except KeyboardInterrupt:
+        print("\nStopped.")
+        ok = False
+    print(f"\nStage timings:\n{timer.summary()}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
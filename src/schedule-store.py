@@ -0,0 +1,93 @@
+import argparse
+import csv
+import glob
+import sys
+
+from shibuya.schedule_store import STORE_FILE, ScheduleStore
+
+DEFAULT_PATTERN = 'data/*.csv'
+
+
+def import_command(store, args):
+    files = sorted({path for pattern in args.patterns for path in glob.glob(pattern)})
+    if not files:
+        print(f"No schedule files match {' '.join(args.patterns)}")
+        return False
+    imported = store.import_files(files)
+    for path, count in imported.items():
+        print(f"✓ {path}: {count} rows")
+    stale = store.prune(files) if args.prune else []
+    for path in stale:
+        print(f"✗ {path}: removed")
+    print(f"{len(imported)} of {len(files)} files imported ({len(files) - len(imported)} unchanged)"
+          + (f", {len(stale)} removed" if stale else ""))
+    return True
+
+
+def month_command(store, args):
+    source = store.month_source(args.month, args.as_of)
+    if source is None:
+        print(f"No schedule for {args.month}" + (f" scraped by {args.as_of}" if args.as_of else ""),
+              file=sys.stderr)
+        return False
+    rows = store.month_rows(args.month, args.as_of)
+    print(f"{source['path']} (scraped {source['scraped']}, {len(rows)} rows)", file=sys.stderr)
+    writer = csv.DictWriter(sys.stdout, fieldnames=['date', 'artist', 'album', 'year'], quoting=csv.QUOTE_NONNUMERIC)
+    writer.writeheader()
+    writer.writerows(rows)
+    return True
+
+
+def artist_command(store, args):
+    plays = store.artist_plays(args.artist)
+    for play in plays:
+        print(f"{play['date']:<32} {play['album']} ({play['artist']})")
+    print(f"\n{len(plays)} plays")
+    return bool(plays)
+
+
+def sources_command(store, args):
+    for source in store.sources():
+        print(f"{source['month']}  scraped {source['scraped']}  {source['rows']:3d} rows  {source['path']}")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Consolidate schedule CSVs into one queryable store')
+    parser.add_argument('--store', default=str(STORE_FILE), help=f'Store file (default: {STORE_FILE})')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = commands.add_parser('import', help='Import new or changed schedule files')
+    import_parser.add_argument('patterns', nargs='*', default=[DEFAULT_PATTERN],
+                               help=f'Schedule files or glob patterns (default: {DEFAULT_PATTERN})')
+    import_parser.add_argument('--prune', action='store_true',
+                               help='Also forget files that no longer match the patterns')
+    import_parser.set_defaults(run=import_command)
+
+    month_parser = commands.add_parser('month', help="Print a month's schedule as CSV")
+    month_parser.add_argument('month', help="Month, e.g. 'June 2026' or 2026-06")
+    month_parser.add_argument('--as-of', metavar='YYYY-MM-DD',
+                              help='Use the newest scrape made on or before this date')
+    month_parser.set_defaults(run=month_command)
+
+    artist_parser = commands.add_parser('artist', help='List every time an artist was played')
+    artist_parser.add_argument('artist')
+    artist_parser.set_defaults(run=artist_command)
+
+    sources_parser = commands.add_parser('sources', help='List the imported files by month and scrape date')
+    sources_parser.set_defaults(run=sources_command)
+    args = parser.parse_args()
+
+    store = ScheduleStore(args.store)
+    try:
+        ok = args.run(store, args)
+    except ValueError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        ok = False
+    finally:
+        store.close()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Shared building blocks for the Shibuya Hi-Fi playlist uploader"""
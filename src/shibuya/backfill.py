@@ -0,0 +1,94 @@
+from datetime import datetime
+from pathlib import Path
+
+from shibuya.resolution_index import canonical_key
+from shibuya.resolver import resolve_albums
+from shibuya.schedule import iter_playlist_data
+from shibuya.tracks import TrackLister
+
+
+def iter_schedule_files(dirs):
+    """Yield every CSV schedule under the given directories, oldest name first"""
+    for directory in dirs:
+        yield from sorted(Path(directory).glob('*.csv'))
+
+
+def iter_file_rows(files):
+    """Yield the rows of each schedule file in turn, skipping files that can't be read"""
+    for path in files:
+        try:
+            rows = list(iter_playlist_data(path))
+        except Exception as e:
+            print(f"Skipping {path}: {e}")
+            continue
+        yield from rows
+
+
+def unique_albums(rows, index, cache):
+    """
+    Collect each distinct album in a stream of schedule rows once, by
+    canonical key. Returns the albums that still need resolving, the
+    number of distinct albums seen and the number of rows read.
+    """
+    seen = set()
+    todo = []
+    row_count = 0
+    for row in rows:
+        row_count += 1
+        if not row.get('artist') or not row.get('album'):
+            continue
+        key = canonical_key(row['artist'], row['album'])
+        if key in seen:
+            continue
+        seen.add(key)
+        found = index.lookup(row['artist'], row['album'])
+        if found and index.tracks(found[0]['id']) is not None:
+            continue  # Fully resolved in an earlier warm-up or upload
+        if not found and cache.get(row['artist'], row['album']) == []:
+            continue  # Already searched without a match
+        todo.append({'artist': row['artist'], 'album': row['album'], 'year': row.get('year')})
+    return todo, len(seen), row_count
+
+
+def warm_albums(sp, todo, cache, index, policy, workers=4, skip_tracks=False, dry_run=False):
+    """
+    Resolve albums (and, unless skip_tracks, their track listings) into the
+    cache and index. Yields (album, ok) in order as each one finishes.
+    """
+    resolved = resolve_albums(sp, todo, cache, policy, workers=workers, index=index, dry_run=dry_run)
+    if skip_tracks:
+        rows = ((album, albums_found, None) for album, albums_found in resolved)
+    else:
+        rows = TrackLister(sp, policy, index).attach(resolved)
+    for album, albums_found, track_uris in rows:
+        yield album, bool(albums_found) and (skip_tracks or track_uris is not None)
+
+
+def plan_playlists(store, files):
+    """
+    Work out one playlist per month from a set of schedule files, using
+    the schedule store's rules: the files are imported into `store`, each
+    belongs to the month most of its rows fall in, and when several cover
+    the same month (re-scrapes) the newest scrape among them is used.
+    Returns [(month_year, path, superseded)] in calendar order; read the
+    rows back with store.month_rows(month_year, paths=files).
+    """
+    paths = []
+    for path in files:
+        try:
+            store.import_file(path)
+        except Exception as e:
+            print(f"Skipping {path}: {e}")
+            continue
+        paths.append(str(Path(path).resolve()))
+    sources = [source for source in store.sources() if source['path'] in paths]
+    plan = []
+    for month in sorted({source['month'] for source in sources}):
+        chosen = store.month_source(month, paths=paths)
+        if not chosen['rows']:
+            print(f"Skipping {chosen['path']}: no albums")
+            continue
+        superseded = [source['path'] for source in sources
+                      if source['month'] == month and source['path'] != chosen['path']]
+        plan.append((datetime.strptime(month, '%Y-%m').strftime('%B %Y'), chosen['path'], superseded))
+    return plan
@@ -0,0 +1,73 @@
+from shibuya.instrumentation import ApiStats, LOG_DIR
+from shibuya.rate_limiter import split_limiters
+from shibuya.retry import RetryPolicy
+from shibuya.search_cache import BACKENDS
+from shibuya.spotify_client import create_client, create_read_client
+
+
+def add_api_arguments(parser, read_rate=True, stats=True):
+    """The options every command that talks to Spotify shares"""
+    parser.add_argument('--cache-backend', choices=sorted(BACKENDS), default='log',
+                        help='Storage backend for the search cache (default: log)')
+    if read_rate:
+        parser.add_argument('--rate', type=float, default=1.0,
+                            help='Maximum Spotify API requests per second, reads and writes together (default: 1.0)')
+        parser.add_argument('--read-rate', type=float,
+                            help='Part of --rate for searches and track listings (default: half, or all of it when '
+                                 'nothing is written)')
+    else:
+        parser.add_argument('--rate', type=float, default=1.0,
+                            help='Maximum Spotify API requests per second (default: 1.0)')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='Number of concurrent album searches (default: 4)')
+    if stats:
+        parser.add_argument('--stats', action='store_true',
+                            help='Print per-endpoint API call counts, latencies, retries and waits as JSON at the end')
+        parser.add_argument('--stats-log', action='store_true',
+                            help=f'Also log every API call, and the summary, to {LOG_DIR}/')
+
+
+def check_rates(parser, args):
+    """Reject a --read-rate that leaves no room for writes within --rate"""
+    if args.read_rate is not None and not 0 < args.read_rate < args.rate:
+        parser.error("--read-rate must be above 0 and below --rate")
+
+
+def create_stats(args):
+    """An ApiStats recorder if --stats or --stats-log was given, else None"""
+    if not (args.stats or args.stats_log):
+        return None
+    return ApiStats(log_dir=LOG_DIR if args.stats_log else None)
+
+
+def create_clients(writing, stats=None):
+    """
+    (read client, write client) for a run. Searches and track listings use
+    an app token; only a run that writes asks for the user's login. Both
+    are None if either client can't be built.
+    """
+    read_sp = create_read_client()
+    if read_sp is None:
+        return None, None
+    sp = None
+    if writing:
+        sp = create_client()
+        if sp is None:
+            return None, None
+    if stats is not None:
+        for client in (read_sp, sp):
+            if client is not None:
+                stats.instrument(client)
+    return read_sp, sp
+
+
+def create_policies(rate, read_rate=None, writing=True, quiet=False):
+    """
+    (read policy, write policy) for a run, on limiters that share one
+    quota of `rate` requests per second (see rate_limiter.split_limiters).
+    The write policy is None when the run doesn't write.
+    """
+    read_limiter, write_limiter = split_limiters(rate, read_rate, writing)
+    read_policy = RetryPolicy(read_limiter, quiet=quiet)
+    write_policy = RetryPolicy(write_limiter, quiet=quiet) if writing else None
+    return read_policy, write_policy
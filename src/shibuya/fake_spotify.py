@@ -0,0 +1,222 @@
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import spotipy
+
+from shibuya.spotify_client import create_session, http_settings
+
+
+def _digest(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class FakeSpotifyServer:
+    """
+    Local stand-in for the Spotify Web API endpoints this project calls:
+    search, albums, album tracks, playlist creation and playlist items.
+    Answers are deterministic for a given query, so runs are comparable.
+
+    - latency / jitter: seconds added to every response
+    - rate_limit_rate: fraction of requests answered 429 with Retry-After
+    - error_burst_rate: chance a request starts a run of burst_length 503s
+    - miss_rate: fraction of search queries that find nothing
+    """
+    def __init__(self, latency=0.03, jitter=0.01, rate_limit_rate=0.0, retry_after=1, error_burst_rate=0.0,
+                 burst_length=3, miss_rate=0.05, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.error_burst_rate = error_burst_rate
+        self.burst_length = burst_length
+        self.miss_rate = miss_rate
+        self.random = random.Random(seed)
+        self.calls = Counter()  # endpoint -> requests
+        self.statuses = Counter()
+        self.playlists = {}
+        self.burst_left = 0
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1/"
+
+    def start(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                server._handle(self, 'GET')
+
+            def do_POST(self):
+                server._handle(self, 'POST')
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def client(self, **kwargs):
+        """A spotipy client pointed at this server, on the same kind of session as the real ones"""
+        pool_size, timeout = http_settings()
+        sp = spotipy.Spotify(auth='fake-token', requests_session=create_session(pool_size), requests_timeout=timeout,
+                             retries=0, **kwargs)
+        sp.prefix = self.url
+        return sp
+
+    def total_calls(self):
+        return sum(self.calls.values())
+
+    # Request handling
+
+    def _injected_error(self):
+        with self._lock:
+            if self.burst_left:
+                self.burst_left -= 1
+                return 503, {}
+            if self.random.random() < self.error_burst_rate:
+                self.burst_left = self.burst_length - 1
+                return 503, {}
+            if self.random.random() < self.rate_limit_rate:
+                return 429, {'Retry-After': str(self.retry_after)}
+            return None
+
+    def _handle(self, request, method):
+        url = urlparse(request.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        parts = [part for part in url.path.split('/') if part][1:]  # drop 'v1'
+        body = None
+        length = int(request.headers.get('Content-Length') or 0)
+        if length:
+            body = json.loads(request.rfile.read(length))
+
+        endpoint, handler = self._route(method, parts)
+        with self._lock:
+            self.calls[endpoint] += 1
+            delay = max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+        time.sleep(delay)
+
+        headers = {}
+        error = self._injected_error()
+        if error is not None:
+            status, headers = error
+            payload = {'error': {'status': status, 'message': 'injected'}}
+        elif handler is None:
+            status, payload = 404, {'error': {'status': 404, 'message': 'Not found'}}
+        else:
+            status, payload = 200, handler(parts, params, body)
+
+        with self._lock:
+            self.statuses[status] += 1
+        data = json.dumps(payload).encode('utf-8')
+        request.send_response(status)
+        request.send_header('Content-Type', 'application/json')
+        request.send_header('Content-Length', str(len(data)))
+        for name, value in headers.items():
+            request.send_header(name, value)
+        request.end_headers()
+        request.wfile.write(data)
+
+    def _route(self, method, parts):
+        if method == 'GET' and parts == ['search']:
+            return 'search', self._search
+        if method == 'GET' and parts == ['albums']:
+            return 'albums', self._albums
+        if method == 'GET' and len(parts) == 3 and parts[0] == 'albums' and parts[2] == 'tracks':
+            return 'album_tracks', self._album_tracks
+        if method == 'POST' and parts == ['me', 'playlists']:
+            return 'playlist_create', self._create_playlist
+        if len(parts) == 3 and parts[0] == 'playlists' and parts[2] in ('items', 'tracks'):
+            if method == 'POST':
+                return 'playlist_add', self._add_items
+            return 'playlist_items', self._playlist_items
+        return f"{method} {'/'.join(parts)}", None
+
+    # Catalogue
+
+    def _track_count(self, album_id):
+        value = int(album_id[:6], 16)
+        # About one album in fifty is a box set that needs paging
+        return 60 + value % 60 if value % 50 == 0 else 6 + value % 15
+
+    def _album(self, album_id, name, released=None):
+        return {'id': album_id, 'name': name, 'uri': f"spotify:album:{album_id}",
+                'album_type': 'album', 'release_date': released or str(1960 + int(album_id[:4], 16) % 60),
+                'total_tracks': self._track_count(album_id),
+                'artists': [{'name': name}]}
+
+    def _tracks(self, album_id):
+        return [{'uri': f"spotify:track:{album_id[:14]}{n:08d}"} for n in range(self._track_count(album_id))]
+
+    def _page(self, items, params, default_limit):
+        limit = int(params.get('limit', default_limit))
+        offset = int(params.get('offset', 0))
+        page = items[offset:offset + limit]
+        more = offset + limit < len(items)
+        return {'items': page, 'total': len(items), 'limit': limit, 'offset': offset,
+                'next': f"offset={offset + limit}" if more else None}
+
+    def _search(self, parts, params, body):
+        query = params.get('q', '')
+        digest = _digest(query)
+        if int(digest[6:10], 16) / 0xffff < self.miss_rate:
+            items = []
+        else:
+            # The real album plus lookalikes - a live version, a single and
+            # a namesake by someone else - in an order that varies by query
+            items = [self._album(digest[:22], query)]
+            for n, (suffix, album_type) in enumerate([(' (Live)', 'album'), ('', 'single'), ('', 'album')]):
+                decoy = self._album(_digest(f"{query}{n}")[:22], query + suffix, items[0]['release_date'])
+                decoy['album_type'] = album_type
+                if n == 2:
+                    decoy['artists'] = [{'name': 'Various Artists'}]
+                items.append(decoy)
+            first = int(digest[10:12], 16) % len(items)
+            items = items[first:] + items[:first]
+        return {'albums': self._page(items, params, 10)}
+
+    def _albums(self, parts, params, body):
+        albums = []
+        for album_id in params.get('ids', '').split(','):
+            album = self._album(album_id, album_id)
+            album['tracks'] = self._page(self._tracks(album_id), {'limit': 50}, 50)
+            albums.append(album)
+        return {'albums': albums}
+
+    def _album_tracks(self, parts, params, body):
+        return self._page(self._tracks(parts[1]), params, 50)
+
+    def _create_playlist(self, parts, params, body):
+        with self._lock:
+            playlist_id = f"fake{len(self.playlists):018d}"
+            self.playlists[playlist_id] = []
+        return {'id': playlist_id, 'name': (body or {}).get('name')}
+
+    def _add_items(self, parts, params, body):
+        with self._lock:
+            self.playlists.setdefault(parts[1], []).extend(body or [])
+        return {'snapshot_id': 'fake'}
+
+    def _playlist_items(self, parts, params, body):
+        items = [{'track': {'uri': uri}} for uri in self.playlists.get(parts[1], [])]
+        return self._page(items, params, 100)
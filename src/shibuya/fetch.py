@@ -0,0 +1,163 @@
+import json
+import os
+from html.parser import HTMLParser
+from pathlib import Path
+from urllib.parse import urljoin
+
+import requests
+from requests.adapters import HTTPAdapter
+
+SCHEDULE_URL = "https://www.shibuyahifi.com/hifi-schedule"
+FETCH_CACHE_FILE = Path(".fetch_cache.json")
+MAX_PAGES = 20
+USER_AGENT = "shibuyahifi-uploader (+https://github.com/markmansour/shibuya-hifi-playlists)"
+
+# Attributes "Load More" controls commonly keep their next-page URL in
+NEXT_URL_ATTRS = ('href', 'data-href', 'data-url', 'data-next', 'data-next-url', 'data-next-page')
+# JSON keys for the rendered fragment and the next page in load-more responses
+HTML_KEYS = ('html', 'content', 'markup')
+NEXT_KEYS = ('next', 'nextPage', 'nextPageUrl', 'next_url', 'next_page_url')
+
+
+class FetchError(Exception):
+    """The schedule page couldn't be downloaded"""
+
+
+class _NextLinkFinder(HTMLParser):
+    """Find where the page's "Load More" control or rel=next link points"""
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.links = []
+        self.open = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if 'next' in (attrs.get('rel') or '').split() and attrs.get('href'):
+            self.links.append(attrs['href'])
+        if tag in ('a', 'button'):
+            self.open.append((tag, attrs, []))
+
+    def handle_data(self, data):
+        for _, _, text in self.open:
+            text.append(data)
+
+    def handle_endtag(self, tag):
+        if not self.open or self.open[-1][0] != tag:
+            return
+        _, attrs, text = self.open.pop()
+        if 'load more' not in ' '.join(''.join(text).split()).lower():
+            return
+        for name in NEXT_URL_ATTRS:
+            value = attrs.get(name)
+            if value and not value.startswith(('#', 'javascript:')):
+                self.links.append(value)
+                return
+
+
+def find_next_url(html, base_url):
+    """Return the absolute URL of the next page of the schedule, if the page links one"""
+    finder = _NextLinkFinder()
+    finder.feed(html)
+    finder.close()
+    return urljoin(base_url, finder.links[0]) if finder.links else None
+
+
+def create_session(pool_size=4):
+    """A pooled HTTP session for the schedule site"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers['User-Agent'] = USER_AGENT
+    return session
+
+
+class ConditionalFetcher:
+    """
+    GET pages over a shared session, remembering each URL's ETag,
+    Last-Modified and body in a small JSON file. Later fetches send
+    If-None-Match / If-Modified-Since, and a 304 reuses the stored body
+    without downloading it again.
+    """
+    def __init__(self, session=None, cache_file=FETCH_CACHE_FILE, timeout=15):
+        self.session = session or create_session()
+        self.cache_file = Path(cache_file)
+        self.timeout = timeout
+        self.not_modified = 0
+        self.downloaded = 0
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.entries = {}
+
+    def get(self, url):
+        """Return (body, content_type) for url"""
+        cached = self.entries.get(url)
+        headers = {}
+        if cached:
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            raise FetchError(f"Could not fetch {url}: {e}")
+
+        if response.status_code == 304 and cached:
+            self.not_modified += 1
+            return cached['body'], cached.get('content_type', '')
+        if response.status_code != 200:
+            raise FetchError(f"Could not fetch {url}: HTTP {response.status_code}")
+
+        self.downloaded += 1
+        content_type = response.headers.get('Content-Type', '')
+        self.entries[url] = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'content_type': content_type,
+            'body': response.text,
+        }
+        return response.text, content_type
+
+    def save(self):
+        tmp_path = self.cache_file.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.cache_file)
+
+
+def _read_page(body, content_type, url):
+    """Split a page into its HTML and the next page's URL; handles JSON load-more responses"""
+    if 'json' in content_type or body.lstrip().startswith('{'):
+        try:
+            data = json.loads(body)
+        except json.JSONDecodeError:
+            data = None
+        if isinstance(data, dict):
+            html = next((data[key] for key in HTML_KEYS if isinstance(data.get(key), str)), '')
+            next_url = next((data[key] for key in NEXT_KEYS if isinstance(data.get(key), str) and data[key]), None)
+            if next_url is None and isinstance(data.get('pagination'), dict):
+                next_url = data['pagination'].get('nextPageUrl') or None
+            return html, urljoin(url, next_url) if next_url else find_next_url(html, url)
+    return body, find_next_url(body, url)
+
+
+def fetch_schedule(url=SCHEDULE_URL, fetcher=None, max_pages=MAX_PAGES):
+    """
+    Download the schedule page and every page its "Load More" control
+    points to, returning one HTML document with all of them in order.
+    Returns (html, page_count).
+    """
+    fetcher = fetcher or ConditionalFetcher()
+    pages = []
+    seen = set()
+    while url and url not in seen and len(pages) < max_pages:
+        seen.add(url)
+        body, content_type = fetcher.get(url)
+        html, url = _read_page(body, content_type, url)
+        pages.append(html)
+    if not pages or not any(page.strip() for page in pages):
+        raise FetchError("The schedule page was empty")
+    return '\n'.join(pages), len(pages)
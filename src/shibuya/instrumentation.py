@@ -0,0 +1,172 @@
+import json
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+import spotipy
+
+LOG_DIR = Path("logs")
+# Upper bounds of the latency histogram buckets, in milliseconds
+LATENCY_BUCKETS_MS = (25, 50, 100, 250, 500, 1000, 2500, 5000)
+# Path segments that follow these are ids, folded so each endpoint is counted once
+ID_PARENTS = ('albums', 'artists', 'playlists', 'tracks', 'users', 'shows', 'episodes')
+
+
+def endpoint_name(method, url):
+    """'GET albums/{id}/tracks' for 'https://api.spotify.com/v1/albums/4aaw.../tracks/?limit=50'"""
+    path = re.sub(r'^https?://[^/]+/v\d+/', '', url).split('?')[0]
+    parts = [part for part in path.split('/') if part]
+    for i in range(1, len(parts)):
+        if parts[i - 1] in ID_PARENTS:
+            parts[i] = '{id}'
+    return f"{method} {'/'.join(parts)}"
+
+
+def _bucket(ms):
+    for bound in LATENCY_BUCKETS_MS:
+        if ms <= bound:
+            return f"<={bound}ms"
+    return f">{LATENCY_BUCKETS_MS[-1]}ms"
+
+
+def percentile(values, p):
+    """The p-th percentile (0-100) of values, nearest rank; 0 for no values"""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+class ApiStats:
+    """
+    Accounting for every Spotify API request a run makes. instrument()
+    wraps a client so each HTTP call - including ones that fail and are
+    retried - is counted and timed per endpoint. summary() combines that
+    with the retry policy, rate limiter and cache counters into one dict.
+
+    With log_dir set, every call is also appended to a JSON lines file
+    there as it completes, followed by the summary at the end.
+    """
+    def __init__(self, log_dir=None, name="api-stats"):
+        self.started = time.monotonic()
+        self.calls = Counter()
+        self.errors = Counter()  # endpoint -> failed responses
+        self.statuses = Counter()
+        self.latencies = {}  # endpoint -> [seconds]
+        self.working = 0.0
+        self._lock = threading.Lock()
+        self.log_path = None
+        self._log = None
+        if log_dir is not None:
+            Path(log_dir).mkdir(parents=True, exist_ok=True)
+            self.log_path = Path(log_dir) / f"{name}-{datetime.now():%Y%m%d-%H%M%S}.jsonl"
+            self._log = open(self.log_path, 'a', encoding='utf-8')
+
+    def instrument(self, sp):
+        """Route the client's requests through this recorder; returns the same client"""
+        internal_call = sp._internal_call
+
+        def timed_call(method, url, payload, params):
+            endpoint = endpoint_name(method, url)
+            started = time.monotonic()
+            status = 200
+            try:
+                return internal_call(method, url, payload, params)
+            except spotipy.exceptions.SpotifyException as e:
+                status = e.http_status
+                raise
+            except Exception as e:
+                status = e.__class__.__name__
+                raise
+            finally:
+                self.record(endpoint, status, time.monotonic() - started)
+
+        sp._internal_call = timed_call
+        return sp
+
+    def record(self, endpoint, status, seconds):
+        with self._lock:
+            self.calls[endpoint] += 1
+            self.statuses[str(status)] += 1
+            if status != 200:
+                self.errors[endpoint] += 1
+            self.latencies.setdefault(endpoint, []).append(seconds)
+            self.working += seconds
+            if self._log is not None:
+                self._log.write(json.dumps({'t': round(time.monotonic() - self.started, 3), 'endpoint': endpoint,
+                                            'status': status, 'ms': round(seconds * 1000, 1)}) + "\n")
+                self._log.flush()
+
+    def summary(self, policies=None, cache=None, index=None):
+        """
+        Everything recorded so far, as a JSON-serialisable dict. `policies`
+        maps a name ('read', 'write') to each RetryPolicy the run used;
+        None values, for a side the run didn't use, are left out.
+        """
+        with self._lock:
+            endpoints = {}
+            for endpoint, count in sorted(self.calls.items()):
+                latencies = self.latencies[endpoint]
+                endpoints[endpoint] = {
+                    'calls': count,
+                    'errors': self.errors[endpoint],
+                    'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+                    'p95_ms': round(percentile(latencies, 95) * 1000, 1),
+                    'max_ms': round(max(latencies) * 1000, 1),
+                }
+            all_latencies = [s for latencies in self.latencies.values() for s in latencies]
+            histogram = Counter(_bucket(s * 1000) for s in all_latencies)
+            result = {
+                'wall_seconds': round(time.monotonic() - self.started, 2),
+                'calls': sum(self.calls.values()),
+                'statuses': dict(sorted(self.statuses.items())),
+                'endpoints': endpoints,
+                'latency_histogram': {label: histogram[label] for label in
+                                      [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS]
+                                      + [f">{LATENCY_BUCKETS_MS[-1]}ms"]},
+                # Summed over worker threads, so these can add up to more than the wall clock
+                'working_seconds': round(self.working, 2),
+            }
+        if policies:
+            sleeping = 0.0
+            result['policies'] = {}
+            for name, policy in policies.items():
+                if policy is None:
+                    continue
+                stats = {'retries': policy.retries, 'rate_limited': policy.rate_limited,
+                         'rate_limit_wait_seconds': round(policy.rate_limit_wait, 2)}
+                sleeping += policy.slept
+                if policy.limiter is not None:
+                    stats['limiter_wait_seconds'] = round(policy.limiter.waited, 2)
+                    sleeping += policy.limiter.waited
+                result['policies'][name] = stats
+            result['sleeping_seconds'] = round(sleeping, 2)
+        if cache is not None:
+            lookups = cache.hits + cache.misses
+            result['cache'] = {'hits': cache.hits, 'misses': cache.misses,
+                               'hit_rate': round(cache.hits / lookups, 3) if lookups else 0.0}
+        if index is not None:
+            result['index_hits'] = index.hits
+        return result
+
+    def report(self, policies=None, cache=None, index=None, show=True):
+        """Print the summary as JSON at the end of a run and finish the log"""
+        summary = self.summary(policies, cache, index)
+        if show:
+            print(f"\nAPI stats:\n{json.dumps(summary, indent=2)}")
+        if self.log_path is not None:
+            print(f"API call log: {self.log_path}")
+        self.close(summary)
+        return summary
+
+    def close(self, summary=None):
+        """Write the summary to the log, if there is one, and close it"""
+        if self._log is None:
+            return
+        if summary is not None:
+            self._log.write(json.dumps({'summary': summary}) + "\n")
+        self._log.close()
+        self._log = None
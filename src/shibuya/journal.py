@@ -0,0 +1,98 @@
+import hashlib
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+JOURNAL_DIR = Path(".journals")
+
+
+def row_key(index, album):
+    """Identify a schedule row by its position and contents"""
+    return f"{index}:{album['artist'].lower()}:{album['album'].lower()}"
+
+
+class RunJournal:
+    """
+    Progress record for one upload run, keyed by input file (or `key`, for
+    input that is re-created under a new name on every run) and playlist
+    name. It stores the playlist id as soon as the playlist exists, the
+    rows whose tracks have all been written, and for a row cut off part-way
+    the number of its tracks already written, so an interrupted run can pick
+    up the same playlist and only do the unfinished work. The file is small and
+    replaced atomically on every update.
+    """
+    def __init__(self, input_file, playlist_name, journal_dir=JOURNAL_DIR, key=None):
+        self.input_file = str(Path(input_file).resolve())
+        self.playlist_name = playlist_name
+        self.key = key or self.input_file
+        digest = hashlib.sha1(f"{self.key}\n{playlist_name}".encode('utf-8')).hexdigest()[:16]
+        self.path = Path(journal_dir) / f"{Path(self.key).stem}-{digest}.json"
+        self.playlist_id = None
+        self.added = set()
+        self.partial = {}  # row key -> tracks already written
+        self.complete = False
+        self.started = None
+
+    def exists(self):
+        return self.path.exists()
+
+    def load(self):
+        """Read progress from disk; returns False if there is nothing usable"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        self.playlist_id = data.get('playlist_id')
+        self.added = set(data.get('added', []))
+        self.partial = data.get('partial', {})
+        self.complete = data.get('complete', False)
+        self.started = data.get('started')
+        return self.playlist_id is not None
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            'input_file': self.input_file,
+            'key': self.key,
+            'playlist_name': self.playlist_name,
+            'playlist_id': self.playlist_id,
+            'started': self.started,
+            'updated': datetime.now().isoformat(timespec='seconds'),
+            'complete': self.complete,
+            'added': sorted(self.added),
+            'partial': self.partial,
+        }
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def start(self, playlist_id):
+        """Begin a fresh run against a newly created playlist"""
+        self.playlist_id = playlist_id
+        self.added = set()
+        self.partial = {}
+        self.complete = False
+        self.started = datetime.now().isoformat(timespec='seconds')
+        self.save()
+
+    def mark_added(self, keys):
+        """Record rows whose tracks are now in the playlist"""
+        keys = list(keys)
+        self.added.update(keys)
+        for key in keys:
+            self.partial.pop(key, None)
+        self.save()
+
+    def mark_partial(self, offsets):
+        """Record how many of a row's tracks are in the playlist so far ({row key: count})"""
+        self.partial.update(offsets)
+        self.save()
+
+    def finish(self):
+        self.complete = True
+        self.save()
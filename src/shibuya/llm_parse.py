@@ -0,0 +1,299 @@
+import csv
+import hashlib
+import io
+import itertools
+import os
+import queue
+import re
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from shibuya.schedule_parser import CSV_HEADER, DATE_RE, WEEKDAYS, parse_month_day, write_schedule_csv
+
+LLM_CACHE_DIR = Path(".llm_cache")
+DEFAULT_MODEL = "claude-sonnet-4.6"
+
+SYSTEM_PROMPT = """You are parsing a file containing a listening calendar of music albums. I want to pull data out of the text I provide which was converted from html. Identify the date the album will be played on, the artist, the album, and the year of release of the album.
+
+IMPORTANT: Only include albums that will be played in TARGET_MONTH TARGET_YEAR. Exclude any albums from other months.
+
+Sort by the date the albums will be played, and not the year they were released. Remove any duplicates. Remove "Deep Listening" from any prefixes. Only respond with the properly formatted CSV data and nothing else. Make sure you include the CSV header line.
+
+Format example:
+date,artist,album,year
+"Wednesday Jan 1, 2025 12:30 AM","Miles Davis","Kind of Blue",1959
+"Wednesday Jan 1, 2025 3:30 AM","Pink Floyd","Dark Side of the Moon",1973
+"Wednesday Jan 1, 2025 5:00 AM","Daft Punk","Random Access Memories",2013"""
+
+FENCE_RE = re.compile(r"```[a-zA-Z]*\n(.*?)```", re.DOTALL)
+# html2text wraps headings and emphasis in markdown: "### Tuesday", "**Jun 2, 2026**"
+MARKUP_RE = re.compile(r"^[#*_>\s]+|[*_\s]+$")
+CSV_DATE_FORMATS = ('%A %b %d, %Y %I:%M %p', '%A %b %d, %Y')
+
+
+class LLMError(Exception):
+    """The llm command failed or didn't return CSV"""
+
+
+def build_prompt(month, year):
+    """Fill the target month and year into SYSTEM_PROMPT"""
+    return SYSTEM_PROMPT.replace('TARGET_MONTH', str(month)).replace('TARGET_YEAR', str(year))
+
+
+def cache_key(text, system_prompt, month, year, model):
+    """Hash everything that can change the model's answer"""
+    digest = hashlib.sha256()
+    for part in (text, system_prompt, str(month), str(year), model):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class LLMCache:
+    """
+    Content-addressed store of extracted CSVs, one file per cache key.
+    Re-running the pipeline or the debug script on byte-identical text with
+    the same prompt, month and model reuses the earlier answer instead of
+    calling the model.
+    """
+    def __init__(self, cache_dir=LLM_CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+
+    def _path(self, key):
+        return self.cache_dir / f"{key}.csv"
+
+    def get(self, key):
+        try:
+            return self._path(key).read_text(encoding='utf-8')
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, csv_text):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp_path = path.with_suffix(f'.{threading.get_ident()}.tmp')
+        tmp_path.write_text(csv_text, encoding='utf-8')
+        os.replace(tmp_path, path)
+
+
+def run_llm(text, system_prompt, model=DEFAULT_MODEL):
+    """Pipe text through `llm -m model -s prompt` and return its response"""
+    try:
+        result = subprocess.run(['llm', '-m', model, '-s', system_prompt], input=text,
+                                capture_output=True, text=True, check=False)
+    except FileNotFoundError:
+        raise LLMError("'llm' tool not found. Please install Simon Willison's llm tool.")
+    if result.returncode != 0:
+        raise LLMError(f"llm exited with status {result.returncode}: {result.stderr.strip()}")
+    return result.stdout
+
+
+def stream_llm(text, system_prompt, model=DEFAULT_MODEL):
+    """Like run_llm, but yield the response line by line as the model produces it"""
+    try:
+        process = subprocess.Popen(['llm', '-m', model, '-s', system_prompt], stdin=subprocess.PIPE,
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    except FileNotFoundError:
+        raise LLMError("'llm' tool not found. Please install Simon Willison's llm tool.")
+    # llm reads all of stdin before it starts answering
+    process.stdin.write(text)
+    process.stdin.close()
+    try:
+        yield from process.stdout
+    finally:
+        process.stdout.close()
+        if process.poll() is None:
+            process.terminate()
+        returncode = process.wait()
+        stderr = process.stderr.read()
+        process.stderr.close()
+    if returncode != 0:
+        raise LLMError(f"llm exited with status {returncode}: {stderr.strip()}")
+
+
+def extract_csv(response):
+    """Pull the CSV out of a model response, unwrapping markdown code fences"""
+    fenced = FENCE_RE.findall(response)
+    if fenced:
+        response = next((block for block in fenced if CSV_HEADER in block), fenced[0])
+    lines = response.strip().splitlines()
+    try:
+        start = next(i for i, line in enumerate(lines) if line.strip() == CSV_HEADER)
+    except StopIteration:
+        raise LLMError("Could not find CSV header in LLM response")
+    return '\n'.join(line for line in lines[start:] if line.strip()) + '\n'
+
+
+def _plain(line):
+    return MARKUP_RE.sub('', line)
+
+
+def month_chunks(text, month, year, days_per_chunk=1):
+    """
+    Cut html2text output down to the blocks dated in `month` `year` and
+    group them into chunks of `days_per_chunk` play days. A block runs from
+    a date line (and the weekday line just above it) to the next date line;
+    navigation and other months are dropped. Returns None if the text has no
+    recognisable date lines, so the caller can send it whole.
+    """
+    lines = text.splitlines()
+    starts = []
+    for i, line in enumerate(lines):
+        match = DATE_RE.match(_plain(line))
+        if not match:
+            continue
+        month_name, day, line_year = match.groups()
+        parsed = parse_month_day(month_name, day, line_year or year)
+        if parsed is None:
+            continue
+        start = i - 1 if i and _plain(lines[i - 1]).rstrip(',') in WEEKDAYS else i
+        starts.append((start, parsed.date()))
+    if not starts:
+        return None
+
+    days = {}
+    for n, (start, day) in enumerate(starts):
+        end = starts[n + 1][0] if n + 1 < len(starts) else len(lines)
+        if day.strftime('%B') == month and day.year == int(year):
+            days.setdefault(day, []).extend(lines[start:end])
+
+    ordered = [days[day] for day in sorted(days)]
+    return ['\n'.join(line for group in ordered[i:i + days_per_chunk] for line in group) + '\n'
+            for i in range(0, len(ordered), days_per_chunk)]
+
+
+def _csv_sort_key(row):
+    for fmt in CSV_DATE_FORMATS:
+        try:
+            return (datetime.strptime(row['date'], fmt), '')
+        except ValueError:
+            continue
+    return (datetime.max, row['date'])
+
+
+def merge_csvs(csv_texts):
+    """Combine per-chunk CSVs into one, sorted by play date with duplicates removed"""
+    rows = []
+    seen = set()
+    for csv_text in csv_texts:
+        for row in csv.DictReader(io.StringIO(csv_text)):
+            if not row.get('date') or not row.get('artist') or not row.get('album'):
+                continue
+            key = (row['date'], row['artist'].strip().lower(), row['album'].strip().lower())
+            if key in seen:
+                continue
+            seen.add(key)
+            year = row.get('year', '').strip()
+            rows.append({'date': row['date'], 'artist': row['artist'].strip(), 'album': row['album'].strip(),
+                         'year': int(year) if year.isdigit() else year})
+    rows.sort(key=_csv_sort_key)
+    out = io.StringIO()
+    write_schedule_csv(rows, out)
+    return out.getvalue()
+
+
+def extract_chunks(chunks, system_prompt, month, year, model=DEFAULT_MODEL, cache=None, workers=4,
+                   refresh=False):
+    """
+    Run each chunk through the model concurrently, reusing cached answers
+    per chunk unless `refresh` is set. Returns (csv_texts, responses,
+    cached_count); responses holds the raw output of the chunks that went to
+    the model.
+    """
+    def extract(chunk):
+        key = cache_key(chunk, system_prompt, month, year, model)
+        if cache is not None and not refresh:
+            cached = cache.get(key)
+            if cached is not None:
+                return cached, None
+        response = run_llm(chunk, system_prompt, model)
+        csv_text = extract_csv(response)
+        if cache is not None:
+            cache.put(key, csv_text)
+        return csv_text, response
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        results = list(executor.map(extract, chunks))
+    csv_texts = [csv_text for csv_text, _ in results]
+    responses = [response for _, response in results if response is not None]
+    return csv_texts, responses, len(results) - len(responses)
+
+
+_DONE = object()
+
+
+def _csv_lines(lines):
+    """Yield the CSV data lines of a response as they arrive, after its header and outside code fences"""
+    in_csv = False
+    for line in lines:
+        stripped = line.strip()
+        if not in_csv:
+            in_csv = stripped == CSV_HEADER
+        elif stripped.startswith('```'):
+            return
+        elif stripped:
+            yield stripped
+
+
+def stream_chunks(chunks, system_prompt, month, year, model=DEFAULT_MODEL, cache=None, workers=4,
+                  refresh=False):
+    """
+    Like extract_chunks, but yield row dicts in chunk order while the model
+    is still answering: the first rows can be searched for before the rest
+    of the schedule has been extracted. Rows repeated across chunks are
+    dropped; each chunk's answer is cached once it is complete.
+    """
+    def produce(chunk, out):
+        try:
+            key = cache_key(chunk, system_prompt, month, year, model)
+            cached = cache.get(key) if cache is not None and not refresh else None
+            if cached is not None:
+                for line in cached.splitlines():
+                    out.put(line)
+                return
+            response = []
+            for line in stream_llm(chunk, system_prompt, model):
+                response.append(line)
+                out.put(line)
+            csv_text = extract_csv(''.join(response))
+            if cache is not None:
+                cache.put(key, csv_text)
+        except Exception as e:
+            out.put(e)
+        finally:
+            out.put(_DONE)
+
+    def drain(out):
+        while True:
+            item = out.get()
+            if item is _DONE:
+                return
+            if isinstance(item, Exception):
+                raise item if isinstance(item, LLMError) else LLMError(str(item))
+            yield item
+
+    executor = ThreadPoolExecutor(max_workers=max(1, workers))
+    try:
+        outputs = []
+        for chunk in chunks:
+            out = queue.Queue()
+            executor.submit(produce, chunk, out)
+            outputs.append(out)
+        seen = set()
+        for out in outputs:
+            header = [CSV_HEADER]
+            for row in csv.DictReader(itertools.chain(header, _csv_lines(drain(out)))):
+                if not row.get('date') or not row.get('artist') or not row.get('album'):
+                    continue
+                key = (row['date'], row['artist'].strip().lower(), row['album'].strip().lower())
+                if key in seen:
+                    continue
+                seen.add(key)
+                year_text = (row.get('year') or '').strip()
+                yield {'date': row['date'], 'artist': row['artist'].strip(), 'album': row['album'].strip(),
+                       'year': int(year_text) if year_text.isdigit() else year_text}
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,158 @@
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+from shibuya.playlist_writer import PlaylistWriter
+
+MASTER_STATE_FILE = Path(".master_playlist.json")
+MASTER_NAME = "Shibuya Hi-fi room, all time"
+# Spotify refuses to add tracks beyond this many in one playlist
+MAX_PLAYLIST_TRACKS = 10000
+
+
+def part_name(name, number):
+    return name if number == 1 else f"{name} (part {number})"
+
+
+class MasterPlaylist:
+    """
+    One cumulative playlist holding every album ever scheduled, split into
+    parts of at most MAX_PLAYLIST_TRACKS tracks. Which albums are already
+    in it, and how full each part is, live in a small local state file, so
+    a run only adds albums it hasn't seen before and never reads the
+    playlist back from Spotify. Albums are never split across parts. As
+    with the upload journal, an album is recorded once all its tracks have
+    been written, and one cut short by a failure or Ctrl-C is kept as
+    partial, so the next run writes only its missing tracks, to the same
+    part. Albums too long for any part are listed in `too_long`.
+    """
+    def __init__(self, sp, policy, name=MASTER_NAME, state_file=MASTER_STATE_FILE,
+                 max_tracks=MAX_PLAYLIST_TRACKS):
+        self.sp = sp
+        self.policy = policy
+        self.name = name
+        self.path = Path(state_file)
+        self.max_tracks = max_tracks
+        self.parts = []  # {'id', 'name', 'tracks'}
+        self.albums = {}  # album id -> part number
+        self.partial = {}  # album id -> {'part', 'tracks' written, 'total'}
+        self.planned = 0  # tracks queued for the newest part, written or not
+        self.writers = {}  # part number -> PlaylistWriter
+        self.pending = {}  # album id -> {'part', 'offset', 'total', 'album', 'artist'} for this run's writes
+        self.queued = set()
+        self.failed = []
+        self.too_long = []
+        self.added = 0
+        self.created = 0
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.parts = data.get('parts', [])
+        self.albums = data.get('albums', {})
+        self.partial = data.get('partial', {})
+        # Room is kept in the newest part for the rest of its partial albums
+        self.planned = self.parts[-1]['tracks'] if self.parts else 0
+        self.planned += sum(entry['total'] - entry['tracks'] for entry in self.partial.values()
+                            if entry['part'] == len(self.parts))
+
+    def save(self):
+        data = {
+            'name': self.name,
+            'updated': datetime.now().isoformat(timespec='seconds'),
+            'parts': self.parts,
+            'albums': self.albums,
+            'partial': self.partial,
+        }
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def contains(self, album_id):
+        return album_id in self.albums or album_id in self.queued
+
+    def _set_written(self, album_id, tracks):
+        """Count an album's tracks written so far into its part"""
+        entry = self.pending[album_id]
+        before = self.partial.get(album_id, {}).get('tracks', 0)
+        self.parts[entry['part'] - 1]['tracks'] += tracks - before
+        self.partial[album_id] = {'part': entry['part'], 'tracks': tracks, 'total': entry['total']}
+
+    def _record_progress(self, progress):
+        for album_id, count in progress.items():
+            self._set_written(album_id, self.pending[album_id]['offset'] + count)
+        self.save()
+
+    def _record_written(self, album_ids):
+        for album_id in album_ids:
+            self._set_written(album_id, self.pending[album_id]['total'])
+            entry = self.pending.pop(album_id)
+            del self.partial[album_id]
+            self.albums[album_id] = entry['part']
+            self.added += 1
+        self.save()
+
+    def _writer(self, part):
+        writer = self.writers.get(part)
+        if writer is None:
+            writer = PlaylistWriter(self.sp, self.parts[part - 1]['id'], self.policy,
+                                    on_written=self._record_written, on_progress=self._record_progress)
+            self.writers[part] = writer
+        return writer
+
+    def _start_part(self):
+        """Flush the current part and create the next one"""
+        self.flush()
+        number = len(self.parts) + 1
+        playlist = self.policy.call(self.sp.current_user_playlist_create, name=part_name(self.name, number),
+                                    public=True,
+                                    description="Every album played at Shibuya Hifi Room, Seattle")
+        self.parts.append({'id': playlist['id'], 'name': part_name(self.name, number), 'tracks': 0})
+        self.save()
+        self.created += 1
+        self.planned = 0
+
+    def add(self, album_id, uris, album_name, artist_name):
+        """
+        Queue an album's tracks, rolling over to a new part when this one
+        would pass the cap. A partial album gets only its missing tracks, in
+        its own part. Returns False if the album is already in the playlist
+        or too long for any part.
+        """
+        if self.contains(album_id):
+            return False
+        if len(uris) > self.max_tracks:
+            self.too_long.append((album_name, artist_name, len(uris)))
+            return False
+        offset = 0
+        if album_id in self.partial:
+            part = self.partial[album_id]['part']
+            offset = self.partial[album_id]['tracks']
+        else:
+            if not self.parts or self.planned + len(uris) > self.max_tracks:
+                self._start_part()
+            part = len(self.parts)
+            self.planned += len(uris)
+        self.queued.add(album_id)
+        self.pending[album_id] = {'part': part, 'offset': offset, 'total': len(uris),
+                                  'album': album_name, 'artist': artist_name}
+        self._writer(part).add(uris[offset:], label=album_id)
+        return True
+
+    def flush(self):
+        """Write everything queued; albums whose tracks couldn't be written are retried next run"""
+        for writer in self.writers.values():
+            writer.flush()
+            for album_id in writer.failed:
+                entry = self.pending.pop(album_id)
+                self.queued.discard(album_id)
+                self.failed.append((entry['album'], entry['artist']))
+        self.writers = {}
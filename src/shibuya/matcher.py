@@ -0,0 +1,92 @@
+import re
+import unicodedata
+
+# Search results fetched per query and ranked locally
+CANDIDATES = 10
+# Below this the best candidate is more likely wrong than right, so the
+# fallback queries are tried; if none does better the album is not found
+MIN_MATCH = 0.4
+# Artist, year and type alone can clear MIN_MATCH, so a candidate must also
+# share this much of its title with the album ("Aja" is not "Gaucho")
+MIN_ALBUM_SIMILARITY = 0.3
+
+WEIGHTS = {'album': 0.45, 'artist': 0.35, 'year': 0.12, 'type': 0.08}
+ALBUM_TYPE_SCORES = {'album': 1.0, 'compilation': 0.5, 'single': 0.2}
+ROMAN_NUMERALS = {'i': '1', 'ii': '2', 'iii': '3', 'iv': '4', 'v': '5',
+                  'vi': '6', 'vii': '7', 'viii': '8', 'ix': '9', 'x': '10'}
+# Marks of a different recording of the album than the one scheduled
+VERSION_WORDS = {'live', 'karaoke', 'tribute', 'remix', 'remixes', 'instrumental', 'covers', 'acoustic', 'demos'}
+VERSION_PENALTY = 0.15
+# Words that carry no identity ("The Who", "Symphony of the ...")
+STOPWORDS = {'the', 'a', 'an', 'and', 'of', 'by', 'with', 'feat', 'featuring'}
+
+
+def fold(s):
+    """Strip accents and spell out "&", keeping the letters (Ólafur & Co -> Olafur and Co)"""
+    return unicodedata.normalize('NFKD', s or '').encode('ascii', 'ignore').decode('ascii').replace('&', ' and ')
+
+
+def number_volumes(words):
+    """Roman numerals after "vol" as digits: ['vol', 'ii'] -> ['vol', '2']"""
+    return [ROMAN_NUMERALS.get(word, word) if i and words[i - 1] == 'vol' else word
+            for i, word in enumerate(words)]
+
+
+def tokens(s):
+    """Normalised word set: accents folded, punctuation dropped, "vol" numbers as digits"""
+    s = re.sub(r'\bvolume\b|\bvol\b\.?', ' vol ', fold(s).lower())
+    words = number_volumes(re.sub(r'[^a-z0-9\s]', ' ', s).split())
+    return {word for word in words if word not in STOPWORDS} or set(words)
+
+
+def token_set_similarity(a, b):
+    """
+    0-1 overlap of two word sets. Averages containment (how much of the
+    smaller set the other covers, so "II" matches "Led Zeppelin II") with
+    Jaccard (which penalises extra words like "Live" or "Karaoke").
+    """
+    if not a or not b:
+        return 0.0
+    common = len(a & b)
+    return (common / min(len(a), len(b)) + common / len(a | b)) / 2
+
+
+def year_score(year, release_date):
+    """1 for the same year, falling to 0 ten years apart; 0.5 when either is unknown"""
+    try:
+        released = int(str(release_date)[:4])
+        year = int(year)
+    except (TypeError, ValueError):
+        return 0.5
+    return max(0.0, 1 - abs(released - year) / 10)
+
+
+def score_candidate(candidate, artist, album, year=None):
+    """How well a search result matches a schedule row, from 0 to 1"""
+    candidate_artists = set()
+    for candidate_artist in candidate.get('artists', []):
+        candidate_artists |= tokens(candidate_artist.get('name'))
+    # Classical rows name composer and performers together, in either field
+    row_words = tokens(f"{artist} {album}")
+    artist_similarity = max(token_set_similarity(tokens(artist), candidate_artists),
+                            token_set_similarity(row_words, candidate_artists) * 0.8)
+    album_similarity = max(token_set_similarity(tokens(album), tokens(candidate.get('name'))),
+                           token_set_similarity(row_words, tokens(candidate.get('name'))) * 0.8)
+    # A different album by the same artist, or someone else's album of the same name
+    if album_similarity < MIN_ALBUM_SIMILARITY or artist_similarity == 0:
+        return 0.0
+    score = (WEIGHTS['album'] * album_similarity
+             + WEIGHTS['artist'] * artist_similarity
+             + WEIGHTS['year'] * year_score(year, candidate.get('release_date'))
+             + WEIGHTS['type'] * ALBUM_TYPE_SCORES.get(candidate.get('album_type'), 0.5))
+    if (tokens(candidate.get('name')) & VERSION_WORDS) - row_words:
+        score -= VERSION_PENALTY
+    return max(0.0, score)
+
+
+def rank_candidates(candidates, artist, album, year=None):
+    """[(score, candidate)] best first; ties keep Spotify's own order"""
+    scored = [(score_candidate(candidate, artist, album, year), i, candidate)
+              for i, candidate in enumerate(candidates) if candidate]
+    scored.sort(key=lambda item: (-item[0], item[1]))
+    return [(score, candidate) for score, _, candidate in scored]
@@ -0,0 +1,205 @@
+import calendar
+import os
+import queue
+import shutil
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from shibuya.fetch import SCHEDULE_URL, ConditionalFetcher, FetchError, fetch_schedule
+from shibuya.llm_parse import DEFAULT_MODEL, LLMCache, LLMError, build_prompt, month_chunks, stream_chunks
+from shibuya.schedule_parser import (HOSTED_RE, ScheduleParseError, csv_fields, html_to_lines, parse_schedule_html,
+                                     schedule_csv_writer)
+
+MONTHS = list(calendar.month_name)[1:]
+DATA_DIR = Path("data")
+TMP_DIR = Path("tmp")
+BROWSER_FETCH_SCRIPT = Path("src/fetch-schedule.js")
+BROWSER_OUTPUT = TMP_DIR / "shibuya-schedule-rendered.html"
+
+
+_END = object()
+
+
+class PipelineError(Exception):
+    """A pipeline stage failed and the run can't continue"""
+
+
+class StageTimer:
+    """
+    Time spent in each pipeline stage, printed as a summary at the end.
+    Streaming stages overlap, so each is charged only for its own work:
+    time a consumer spends waiting on a wrapped producer is charged to the
+    producer.
+    """
+    def __init__(self):
+        self.started = time.monotonic()
+        self.timings = {}
+        self.first_row = None
+        self._claimed = 0.0
+
+    def _charge(self, name, seconds):
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name):
+        print(f"\n== {name} ==", flush=True)
+        start = time.monotonic()
+        claimed = self._claimed
+        try:
+            yield
+        finally:
+            own = time.monotonic() - start - (self._claimed - claimed)
+            self._charge(name, own)
+            self._claimed += own
+
+    def wrap(self, name, rows):
+        """Pass rows through, charging the time spent producing each one to `name`"""
+        self._charge(name, 0.0)
+        return self._timed(name, iter(rows))
+
+    def _timed(self, name, rows):
+        while True:
+            start = time.monotonic()
+            claimed = self._claimed
+            try:
+                row = next(rows, _END)
+            finally:
+                own = time.monotonic() - start - (self._claimed - claimed)
+                self._charge(name, own)
+                self._claimed += own
+            if row is _END:
+                return
+            if self.first_row is None:
+                self.first_row = time.monotonic() - self.started
+            yield row
+
+    def summary(self):
+        total = time.monotonic() - self.started
+        lines = [f"  {name:<16} {seconds:7.2f}s" for name, seconds in self.timings.items()]
+        if self.first_row is not None:
+            lines.append(f"  {'first row':<16} {self.first_row:7.2f}s")
+        lines.append(f"  {'total':<16} {total:7.2f}s")
+        return '\n'.join(lines)
+
+
+def count_sessions(html):
+    return sum(1 for line in html_to_lines(html) if HOSTED_RE.match(line))
+
+
+def _fetch_with_browser():
+    """Last resort for a client-rendered page: the Playwright script"""
+    if not shutil.which('node') or not BROWSER_FETCH_SCRIPT.exists():
+        return None
+    print("Falling back to the headless browser...")
+    if subprocess.run(['node', str(BROWSER_FETCH_SCRIPT)]).returncode != 0:
+        return None
+    return BROWSER_OUTPUT.read_text(encoding='utf-8')
+
+
+def fetch_html(html_file=None, url=SCHEDULE_URL):
+    """Read the schedule HTML from a file, or download it and its Load More pages"""
+    if html_file:
+        print(f"Using local HTML file: {html_file}")
+        return Path(html_file).read_text(encoding='utf-8', errors='replace')
+
+    fetcher = ConditionalFetcher()
+    try:
+        html, pages = fetch_schedule(url, fetcher)
+        fetcher.save()
+        sessions = count_sessions(html)
+        print(f"✓ Fetched {pages} pages ({fetcher.not_modified} unchanged), {sessions} sessions")
+    except FetchError as e:
+        print(f"✗ {e}")
+        html, sessions = None, 0
+    if sessions:
+        return html
+
+    html = _fetch_with_browser() or html
+    if html is None:
+        raise PipelineError("Could not download the schedule")
+    return html
+
+
+def parse_html(html, month, year, model=DEFAULT_MODEL, use_llm_cache=True, workers=4):
+    """
+    Yield date/artist/album/year rows for `month` `year` from schedule HTML.
+    The local parser is tried first; the LLM only sees the page if the
+    parser's structural checks fail, and its rows are yielded as the model
+    writes them.
+    """
+    try:
+        rows = parse_schedule_html(html, month=month, year=year)
+        print(f"✓ Parsed {len(rows)} sessions locally")
+        yield from rows
+        return
+    except ScheduleParseError as e:
+        print(f"✗ Local parser: {e}")
+
+    print(f"Falling back to the LLM ({model})...")
+    text = '\n'.join(html_to_lines(html)) + '\n'
+    chunks = month_chunks(text, month, year)
+    if chunks is None:
+        chunks = [text]
+    print(f"Extracting {len(chunks)} chunks")
+    try:
+        yield from stream_chunks(chunks, build_prompt(month, year), month, year, model,
+                                 LLMCache(), workers, refresh=not use_llm_cache)
+    except LLMError as e:
+        raise PipelineError(f"LLM parsing failed: {e}")
+
+
+def validate_rows(rows):
+    """Pass through the rows the uploader can use, reporting each one that's dropped"""
+    for i, row in enumerate(rows, 1):
+        missing = [field for field in ('date', 'artist', 'album') if not str(row.get(field) or '').strip()]
+        if missing:
+            print(f"  Skipping row {i}: missing {', '.join(missing)}")
+            continue
+        yield row
+
+
+def save_csv(rows, path):
+    """
+    Write rows to a CSV while passing them on. A background thread drains
+    `rows` into a temporary file and replaces `path` as soon as the last
+    row is parsed, so the schedule is saved however far the upload that
+    reads the rows gets; a parse that fails never leaves a truncated file
+    in data/. The thread isn't a daemon, so an upload that stops early
+    still waits for the save.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".part")
+    out = queue.Queue()
+
+    def produce():
+        count = 0
+        saved = False
+        try:
+            with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+                writer = schedule_csv_writer(f)
+                for row in rows:
+                    writer.writerow(csv_fields(row))
+                    count += 1
+                    out.put(row)
+            os.replace(tmp_path, path)
+            saved = True
+            print(f"Saved {count} rows to {path}", flush=True)
+        except Exception as e:
+            out.put(e)
+        finally:
+            if not saved:
+                tmp_path.unlink(missing_ok=True)
+            out.put(_END)
+
+    threading.Thread(target=produce, name='save-csv').start()
+    while True:
+        row = out.get()
+        if row is _END:
+            return
+        if isinstance(row, Exception):
+            raise row
+        yield row
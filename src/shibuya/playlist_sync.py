@@ -0,0 +1,129 @@
+from collections import Counter
+
+from shibuya.playlist_writer import MAX_ITEMS_PER_CALL
+
+
+def fetch_playlist_uris(sp, playlist_id, policy):
+    """Read a playlist's track URIs in order, 100 per request"""
+    uris = []
+    offset = 0
+    while True:
+        page = policy.call(sp.playlist_items, playlist_id, limit=MAX_ITEMS_PER_CALL, offset=offset,
+                           additional_types=('track',))
+        for entry in page['items']:
+            # Newer API responses name the field 'item' rather than 'track'
+            track = entry.get('track') or entry.get('item')
+            if track and track.get('uri'):
+                uris.append(track['uri'])
+        offset += len(page['items'])
+        if not page.get('next') or not page['items']:
+            return uris
+
+
+def plan_sync(current, target):
+    """
+    Work out the playlist edits that turn `current` into `target`.
+
+    Returns a list of operations, to be applied in order:
+      ('remove_positions', [(uri, [positions...]), ...])  - excess duplicates
+      ('remove', [uri, ...])                              - every occurrence
+      ('move', range_start, range_length, insert_before)
+      ('add', position, [uri, ...])
+    Runs of consecutive tracks are moved or added in a single operation, so a
+    small schedule change turns into a handful of calls.
+    """
+    ops = []
+    wanted = Counter(target)
+    have = Counter(current)
+
+    # Drop duplicates beyond what the target needs, keeping the earliest
+    # copies. Highest positions go first, 100 per call, so each call's
+    # positions are still right after the calls before it
+    excess = []
+    seen = Counter()
+    for position, uri in enumerate(current):
+        seen[uri] += 1
+        if wanted[uri] and seen[uri] > wanted[uri]:
+            excess.append((position, uri))
+    excess.reverse()
+    for start in range(0, len(excess), MAX_ITEMS_PER_CALL):
+        batch = {}
+        for position, uri in excess[start:start + MAX_ITEMS_PER_CALL]:
+            batch.setdefault(uri, []).append(position)
+        ops.append(('remove_positions', list(batch.items())))
+
+    gone = [uri for uri in have if not wanted[uri]]
+    for start in range(0, len(gone), MAX_ITEMS_PER_CALL):
+        ops.append(('remove', gone[start:start + MAX_ITEMS_PER_CALL]))
+
+    working = []
+    kept = Counter()
+    for uri in current:
+        if wanted[uri] and kept[uri] < wanted[uri]:
+            working.append(uri)
+            kept[uri] += 1
+
+    # Walk the target; whenever the working copy disagrees, either move the
+    # run that belongs here from further down, or insert the missing run
+    j = 0
+    while j < len(target):
+        if j < len(working) and working[j] == target[j]:
+            j += 1
+            continue
+        try:
+            k = working.index(target[j], j)
+        except ValueError:
+            k = None
+        if k is not None:
+            length = 1
+            while (k + length < len(working) and j + length < len(target)
+                   and working[k + length] == target[j + length]):
+                length += 1
+            ops.append(('move', k, length, j))
+            working[j:j] = working[k:k + length]
+            del working[k + length:k + 2 * length]
+            j += length
+        else:
+            run = []
+            remaining = Counter(working[j:])
+            while (j + len(run) < len(target) and len(run) < MAX_ITEMS_PER_CALL
+                   and not remaining[target[j + len(run)]]):
+                run.append(target[j + len(run)])
+            ops.append(('add', j, run))
+            working[j:j] = run
+            j += len(run)
+    return ops
+
+
+def apply_sync(sp, playlist_id, ops, policy):
+    """Send planned operations to Spotify; returns the number of calls made"""
+    calls = 0
+    for op in ops:
+        if op[0] == 'remove_positions':
+            items = [{'uri': uri, 'positions': positions} for uri, positions in op[1]]
+            policy.call(sp.playlist_remove_specific_occurrences_of_items, playlist_id, items)
+        elif op[0] == 'remove':
+            policy.call(sp.playlist_remove_all_occurrences_of_items, playlist_id, op[1])
+        elif op[0] == 'move':
+            _, range_start, range_length, insert_before = op
+            policy.call(sp.playlist_reorder_items, playlist_id, range_start=range_start,
+                        insert_before=insert_before, range_length=range_length)
+        elif op[0] == 'add':
+            policy.call(sp.playlist_add_items, playlist_id, op[2], position=op[1])
+        calls += 1
+    return calls
+
+
+def describe_ops(ops):
+    """Summarise a sync plan as counts of tracks removed, moved and added"""
+    removed = moved = added = 0
+    for op in ops:
+        if op[0] == 'remove_positions':
+            removed += sum(len(positions) for _, positions in op[1])
+        elif op[0] == 'remove':
+            removed += len(op[1])
+        elif op[0] == 'move':
+            moved += op[2]
+        elif op[0] == 'add':
+            added += len(op[2])
+    return f"{removed} removed, {moved} moved, {added} added in {len(ops)} calls"
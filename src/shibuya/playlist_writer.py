@@ -0,0 +1,82 @@
+import spotipy
+
+from shibuya.retry import RetriesExhausted, RetryPolicy
+
+# Spotify accepts at most 100 items per playlist_add_items call
+MAX_ITEMS_PER_CALL = 100
+
+
+class PlaylistWriter:
+    """
+    Buffer track URIs in schedule order and write them to a playlist in
+    chunks of up to 100. Full chunks are written as soon as the buffer fills;
+    flush() writes the remainder. A chunk that fails is retried on its own
+    (under the retry policy) before moving on, so a failure never re-sends
+    tracks that already landed.
+
+    on_written, if given, is called with the labels whose tracks have all
+    been written after each successful chunk. on_progress, if given, is
+    called with {label: tracks written so far} for a label whose tracks
+    straddle the chunk boundary. Once a chunk fails, the rest of its labels'
+    tracks are dropped from the buffer and those labels are never reported,
+    so what was reported is always a prefix of each label's tracks.
+    """
+    def __init__(self, sp, playlist_id, policy=None, chunk_size=MAX_ITEMS_PER_CALL, on_written=None,
+                 on_progress=None):
+        self.sp = sp
+        self.playlist_id = playlist_id
+        self.policy = policy or RetryPolicy()
+        self.chunk_size = min(chunk_size, MAX_ITEMS_PER_CALL)
+        self.on_written = on_written
+        self.on_progress = on_progress
+        self.progress = {}  # label -> tracks written
+        self.buffer = []  # (uri, label) pairs
+        self.failed = []  # labels with at least one track that could not be written
+        self.calls = 0
+        self.written = 0
+
+    def add(self, uris, label=None):
+        """Queue an album's tracks, writing any chunks that are now full"""
+        self.buffer.extend((uri, label) for uri in uris)
+        while len(self.buffer) >= self.chunk_size:
+            self._write_next_chunk()
+
+    def flush(self):
+        """Write everything still buffered"""
+        while self.buffer:
+            self._write_next_chunk()
+
+    def _write_next_chunk(self):
+        chunk = self.buffer[:self.chunk_size]
+        del self.buffer[:self.chunk_size]
+        if not self._write_chunk(chunk):
+            return
+        # An album whose tracks straddle the chunk boundary isn't done yet
+        pending = self.buffer[0][1] if self.buffer else None
+        done = []
+        for _, label in chunk:
+            if label is None or label in self.failed:
+                continue
+            self.progress[label] = self.progress.get(label, 0) + 1
+            if label != pending and label not in done:
+                done.append(label)
+        if done and self.on_written is not None:
+            self.on_written(done)
+        if pending is not None and pending in self.progress and self.on_progress is not None:
+            self.on_progress({pending: self.progress[pending]})
+
+    def _write_chunk(self, chunk):
+        uris = [uri for uri, _ in chunk]
+        try:
+            self.calls += 1
+            self.policy.call(self.sp.playlist_add_items, playlist_id=self.playlist_id, items=uris)
+        except (RetriesExhausted, spotipy.exceptions.SpotifyException):
+            labels = [label for _, label in chunk if label is not None]
+            for label in labels:
+                if label not in self.failed:
+                    self.failed.append(label)
+            # Writing the rest of a failed album would leave a gap in the middle of it
+            self.buffer = [(uri, label) for uri, label in self.buffer if label not in labels]
+            return False
+        self.written += len(uris)
+        return True
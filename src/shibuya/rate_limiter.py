@@ -0,0 +1,100 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket shared by every Spotify call in a run.
+
+    `rate` tokens are added per second up to `capacity`; acquire() blocks
+    until a token is available. A 429 calls penalize(), which stops all
+    callers until Retry-After has passed and halves the rate. The rate then
+    climbs back towards its configured value as calls succeed.
+
+    A bucket with a parent also takes a token from the parent for every
+    call, and passes the pause of a penalty up to it, so buckets sharing a
+    parent split one quota and a 429 on any of them pauses them all. Only
+    the bucket that got the 429 slows down.
+    """
+    def __init__(self, rate=1.0, capacity=3, min_rate=0.05, recovery=1.1, parent=None):
+        self.parent = parent
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self.min_rate = min_rate
+        self.recovery = recovery
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.waited = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """Block until a request may be sent"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    delay = self.paused_until - now
+                else:
+                    self._refill(now)
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        break
+                    delay = (1 - self.tokens) / self.rate
+                self.waited += delay
+            time.sleep(delay)
+        if self.parent is not None:
+            started = time.monotonic()
+            self.parent.acquire()
+            with self._lock:
+                self.waited += time.monotonic() - started
+
+    def penalize(self, retry_after):
+        """
+        Pause every caller for retry_after seconds and slow down. 429s that
+        arrive during a pause were sent before it began, so they only extend
+        the pause; the rate is halved once per pause.
+        """
+        with self._lock:
+            if time.monotonic() >= self.paused_until:
+                self.rate = max(self.min_rate, self.rate / 2)
+        self.pause(retry_after)
+
+    def pause(self, seconds):
+        """Hold back every caller, and every bucket sharing the parent, for `seconds` without slowing down"""
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0
+            self.updated = self.paused_until
+        if self.parent is not None:
+            self.parent.pause(seconds)
+
+    def reward(self):
+        """Record a successful call, recovering the rate after a penalty"""
+        with self._lock:
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate * self.recovery)
+        if self.parent is not None:
+            self.parent.reward()
+
+
+def split_limiters(rate, read_rate=None, writing=True):
+    """
+    (read limiter, write limiter) sharing one quota of `rate` requests per
+    second, since Spotify limits per app, not per client. Reads get
+    read_rate of it - by default half, or all of it when nothing is
+    written - and writes the rest. The write limiter is None when not writing.
+    """
+    if read_rate is None:
+        read_rate = rate / 2 if writing else rate
+    if read_rate > rate or (writing and read_rate >= rate):
+        raise ValueError(f"read rate {read_rate:g} must leave room within the total rate {rate:g}")
+    shared = TokenBucket(rate=rate)
+    read_limiter = TokenBucket(rate=read_rate, parent=shared)
+    write_limiter = TokenBucket(rate=rate - read_rate, parent=shared) if writing else None
+    return read_limiter, write_limiter
@@ -0,0 +1,118 @@
+import re
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from shibuya.matcher import fold, number_volumes
+from shibuya.resolver import clean_string
+from shibuya.search_cache import LogCacheBackend
+
+# Album fields worth keeping; full search results carry images, markets etc.
+ALBUM_FIELDS = ('id', 'name', 'uri', 'release_date', 'total_tracks', 'album_type')
+
+
+def canonical_key(artist, album):
+    """
+    Normalise an artist/album pair so spelling variants share one key.
+    Applies the same rewrites search_album falls back on - "Volume" to
+    "Vol." and dropping a leading "The" - plus accent folding, "&" to
+    "and", and Roman volume numbers to digits.
+    """
+    artist = fold(artist)
+    album = fold(album).replace("Volume ", "Vol.")
+    artist = clean_string(artist).split()
+    if artist[:1] == ['the']:
+        artist = artist[1:]
+    album = number_volumes(clean_string(re.sub(r'(?i)\bvol\.?\s*', 'vol ', album)).split())
+    return f"{' '.join(artist)}:{' '.join(album)}"
+
+
+def slim_album(album):
+    """Keep just the fields the uploader reads from a search result"""
+    slim = {field: album[field] for field in ALBUM_FIELDS if field in album}
+    slim['artists'] = [{'name': artist['name']} for artist in album.get('artists', [])]
+    return slim
+
+
+class ResolutionIndex:
+    """
+    Durable map from canonical artist/album to the Spotify album it resolved
+    to and that album's track URIs. Unlike SearchCache, whose keys are the
+    raw schedule text, a repeat album in any later month hits this index
+    even if the schedule spells it differently, and costs no API calls once
+    its tracks are known. Only successful resolutions are stored.
+    """
+    def __init__(self, index_file=".resolution_index.log"):
+        self.backend = LogCacheBackend(Path(index_file))
+        self.entries = self.backend.load()
+        self.by_album_id = {entry['album']['id']: key for key, entry in self.entries.items()}
+        self.hits = 0
+        self._lock = threading.Lock()
+
+    def lookup(self, artist, album):
+        """Return [album] for a known pair, in the same shape as search results"""
+        entry = self.entries.get(canonical_key(artist, album))
+        if entry is None:
+            return None
+        self.hits += 1
+        return [entry['album']]
+
+    def record_album(self, artist, album, found):
+        key = canonical_key(artist, album)
+        with self._lock:
+            existing = self.entries.get(key)
+            if existing is not None and existing['album']['id'] == found['id']:
+                return
+            # Another spelling may already have resolved to this album
+            entry = {'album': slim_album(found), 'tracks': self.tracks(found['id']),
+                     'resolved': datetime.now().isoformat(timespec='seconds')}
+            self.entries[key] = entry
+            self.by_album_id[found['id']] = key
+            self.backend.put(key, entry)
+
+    def tracks(self, album_id):
+        """Return the stored track URIs for an album id, or None"""
+        key = self.by_album_id.get(album_id)
+        if key is None:
+            return None
+        return self.entries[key].get('tracks')
+
+    def record_tracks(self, album_id, uris):
+        with self._lock:
+            key = self.by_album_id.get(album_id)
+            if key is None:
+                return
+            entry = dict(self.entries[key], tracks=list(uris))
+            self.entries[key] = entry
+            self.backend.put(key, entry)
+
+    def invalidate(self, artist=None, album=None):
+        """Forget resolutions matching an artist and/or album; returns how many were dropped"""
+        if artist is None and album is None:
+            return 0
+        artist_prefix = canonical_key(artist, '') if artist is not None else None
+        album_suffix = canonical_key('', album) if album is not None else None
+        with self._lock:
+            doomed = [key for key in self.entries
+                      if (artist_prefix is None or key.startswith(artist_prefix))
+                      and (album_suffix is None or key.endswith(album_suffix))]
+            for key in doomed:
+                entry = self.entries.pop(key)
+                if self.by_album_id.get(entry['album']['id']) == key:
+                    del self.by_album_id[entry['album']['id']]
+                self.backend.delete(key)
+            self.backend.sync()
+        return len(doomed)
+
+    def size(self):
+        return len(self.entries)
+
+    def close(self):
+        with self._lock:
+            self.backend.close()
+
+    def clear(self):
+        with self._lock:
+            self.backend.remove()
+            self.entries = {}
+            self.by_album_id = {}
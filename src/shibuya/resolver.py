@@ -0,0 +1,195 @@
+import re
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from shibuya.matcher import CANDIDATES, MIN_MATCH, rank_candidates
+from shibuya.retry import RetriesExhausted, RetryPolicy
+
+
+def clean_string(s):
+    """Remove non-alphanumeric characters and return lowercase string"""
+    return re.sub(r'[^a-zA-Z0-9\s]', '', s).lower()
+
+
+def _search(sp, query, policy, stop=None):
+    """Run one album search under the shared retry policy; finds nothing once `stop` is set"""
+    def search(**kwargs):
+        # Checked after the rate limiter lets the call through
+        if stop is not None and stop.is_set():
+            return {'albums': {'items': []}}
+        return sp.search(**kwargs)
+
+    results = policy.call(search, q=query, type='album', limit=CANDIDATES, offset=0)
+    return results['albums']['items']
+
+
+def abbreviate_volume(artist, album):
+    """Shorten "Volume" to "Vol." in the album title ("Volume I" → "Vol.I")"""
+    if "Volume " in album:
+        return artist, album.replace("Volume ", "Vol.")
+    return None
+
+
+def toggle_the(artist, album):
+    """Add a leading "The" to the artist, or drop it ("Raconteurs" ↔ "The Raconteurs")"""
+    if artist.startswith("The "):
+        return artist[4:], album
+    return f"The {artist}", album
+
+
+def drop_performers(artist, album):
+    """Drop parenthesised performers from the artist, keeping e.g. just the composer"""
+    stripped = re.sub(r'\s*\(.*?\)', '', artist).strip()
+    if stripped and stripped != artist:
+        return stripped, album
+    return None
+
+
+# Fallback rewrites of an artist/album pair, tried when the plain query
+# finds no plausible match. Each returns a new (artist, album) or None.
+QUERY_REWRITES = [abbreviate_volume, toggle_the, drop_performers]
+
+
+def search_queries(artist, album, rewrites=QUERY_REWRITES):
+    """The plain "artist album" query followed by each distinct rewritten one"""
+    queries = [clean_string(f"{artist} {album}")]
+    for rewrite in rewrites:
+        rewritten = rewrite(artist, album)
+        if rewritten is not None:
+            query = clean_string(' '.join(rewritten))
+            if query not in queries:
+                queries.append(query)
+    return queries
+
+
+def _best(ranked, best):
+    if ranked and (best is None or ranked[0][0] > best[0]):
+        return ranked[0]
+    return best
+
+
+def _search_fallbacks(sp, queries, artist, album, year, policy, best):
+    """
+    Run the fallback queries concurrently and return the best (score,
+    candidate) once one is a plausible match, cancelling the rest. Queries
+    still waiting on the rate limiter when that happens are skipped. Raises
+    RetriesExhausted if nothing matched and any query failed.
+    """
+    stop = threading.Event()
+
+    def run(query):
+        return rank_candidates(_search(sp, query, policy, stop), artist, album, year)
+
+    executor = ThreadPoolExecutor(max_workers=len(queries))
+    failure = None
+    try:
+        futures = [executor.submit(run, query) for query in queries]
+        for future in as_completed(futures):
+            try:
+                best = _best(future.result(), best)
+            except RetriesExhausted as e:
+                failure = e
+                continue
+            if best is not None and best[0] >= MIN_MATCH:
+                return best
+    finally:
+        stop.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+    if failure is not None:
+        raise failure
+    return best
+
+
+def search_album(sp, artist, album, cache, policy=None, dry_run=False, year=None, rewrites=QUERY_REWRITES):
+    """
+    Search for album with caching. Each query fetches a page of candidates
+    which are ranked locally (see matcher.score_candidate). Only when the
+    plain query has no plausible match are the `rewrites` tried, all at
+    once, so a miss costs about one extra round trip.
+    """
+    # Check cache first
+    cached_result = cache.get(artist, album)
+    if cached_result is not None:
+        return cached_result
+
+    if policy is None:
+        policy = RetryPolicy(quiet=dry_run)
+
+    query, *fallbacks = search_queries(artist, album, rewrites)
+    try:
+        best = _best(rank_candidates(_search(sp, query, policy), artist, album, year), None)
+        if fallbacks and (best is None or best[0] < MIN_MATCH):
+            best = _search_fallbacks(sp, fallbacks, artist, album, year, policy, best)
+    except RetriesExhausted:
+        # Cache failure so we don't retry endlessly; it expires quickly
+        cache.set(artist, album, [], failed=True)
+        return []
+
+    # Cache the result (even if empty) to avoid re-searching
+    albums_found = [best[1]] if best is not None and best[0] >= MIN_MATCH else []
+    cache.set(artist, album, albums_found)
+    return albums_found
+
+
+def resolve_albums(sp, albums, cache, policy, workers=4, dry_run=False, index=None, window=None):
+    """
+    Search for every album on a thread pool. Repeated artist/album pairs are
+    only searched once, and pairs already in the resolution index aren't
+    searched at all. Yields (album, albums_found) in schedule order as soon
+    as each row is resolved, so callers can report progress while later
+    searches are still in flight.
+
+    `albums` can be any iterable, including a generator still producing
+    rows: at most `window` rows (default workers * 4) are read ahead of the
+    one being yielded, so searching starts with the first row and memory
+    doesn't grow with the length of the schedule.
+    """
+    window = window or workers * 4
+
+    def key(album):
+        return (album['artist'].lower(), album['album'].lower())
+
+    def resolve(artist, album, year):
+        if index is not None:
+            albums_found = index.lookup(artist, album)
+            if albums_found:
+                return albums_found
+        albums_found = search_album(sp, artist, album, cache, policy, dry_run=dry_run, year=year)
+        if albums_found and index is not None:
+            index.record_album(artist, album, albums_found[0])
+        return albums_found
+
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        queued = deque()
+        # Searches for pairs in the window, with how many queued rows share each
+        futures = {}
+        rows = iter(albums)
+        exhausted = False
+        while True:
+            # Read ahead until the window is full, but hand back the oldest
+            # row as soon as it's resolved rather than waiting on a slow source
+            while not exhausted and len(queued) < window and not (queued and futures[key(queued[0])][0].done()):
+                album = next(rows, None)
+                if album is None:
+                    exhausted = True
+                    break
+                if key(album) not in futures:
+                    futures[key(album)] = [executor.submit(resolve, album['artist'], album['album'],
+                                                                    album.get('year')), 0]
+                futures[key(album)][1] += 1
+                queued.append(album)
+            if not queued:
+                return
+            album = queued.popleft()
+            entry = futures[key(album)]
+            albums_found = entry[0].result()
+            entry[1] -= 1
+            if not entry[1]:
+                # A later repeat is answered by the cache or index
+                del futures[key(album)]
+            yield album, albums_found
+    finally:
+        # Drop queued searches if the caller stops early (e.g. Ctrl-C)
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,139 @@
+import random
+import sys
+import threading
+import time
+
+import requests
+import spotipy
+
+
+class RetriesExhausted(Exception):
+    """A call kept failing with retryable errors until its attempts or deadline ran out"""
+    def __init__(self, message, last_error=None):
+        super().__init__(message)
+        self.last_error = last_error
+
+
+class CircuitOpen(RetriesExhausted):
+    """Spotify has returned too many server errors in a row; calls fail fast until the cooldown ends"""
+
+
+def retry_after_seconds(e):
+    """Read the Retry-After header from a SpotifyException, if there is one"""
+    headers = getattr(e, 'headers', None) or {}
+    try:
+        return int(headers.get('Retry-After'))
+    except (ValueError, TypeError):
+        return None
+
+
+class RetryPolicy:
+    """
+    Run Spotify calls with bounded, iterative retries. Shared by every call
+    in a run - searches, track listings, playlist creation and writes.
+
+    - Each call first takes a token from the shared limiter.
+    - 429s wait for Retry-After (or a backoff) and pause the whole limiter.
+    - 5xx and connection errors back off exponentially with full jitter.
+    - Other errors (bad requests, auth failures) are raised immediately.
+    - A call gives up after max_attempts or once `deadline` seconds have
+      passed, raising RetriesExhausted.
+    - After breaker_threshold consecutive server errors across all calls the
+      circuit opens: calls raise CircuitOpen without touching the API until
+      breaker_cooldown has passed, then one trial call is let through.
+
+    The client must be built on spotify_client.create_session: spotipy's
+    default session retries 429s and 5xx itself and raises them without
+    their status headers, so none of the above would ever run.
+    """
+    def __init__(self, limiter=None, max_attempts=4, base_delay=1.0, max_delay=60.0, deadline=120.0,
+                 breaker_threshold=5, breaker_cooldown=60.0, quiet=False):
+        self.limiter = limiter
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.quiet = quiet
+        self.server_errors = 0
+        self.open_until = 0.0
+        self.retries = 0
+        self.rate_limited = 0
+        self.rate_limit_wait = 0.0  # seconds 429s told us (or we chose) to wait
+        self.slept = 0.0  # backoff sleeps outside the limiter
+        self._lock = threading.Lock()
+
+    def _backoff(self, attempt):
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt + 1)))
+
+    def _check_breaker(self):
+        with self._lock:
+            now = time.monotonic()
+            if self.server_errors >= self.breaker_threshold:
+                if now < self.open_until:
+                    raise CircuitOpen(f"Circuit open after {self.server_errors} consecutive server errors")
+                # Half-open: let this call through as a trial
+                self.open_until = now + self.breaker_cooldown
+
+    def _record_server_error(self):
+        with self._lock:
+            self.server_errors += 1
+            if self.server_errors == self.breaker_threshold:
+                self.open_until = time.monotonic() + self.breaker_cooldown
+                if not self.quiet:
+                    print(f"\nSpotify returned {self.server_errors} server errors in a row, "
+                          f"pausing calls for {self.breaker_cooldown:.0f}s", file=sys.stderr, flush=True)
+
+    def _record_success(self):
+        with self._lock:
+            self.server_errors = 0
+        if self.limiter is not None:
+            self.limiter.reward()
+
+    def call(self, fn, *args, **kwargs):
+        """Call fn(*args, **kwargs) under the policy and return its result"""
+        give_up_at = time.monotonic() + self.deadline
+        for attempt in range(self.max_attempts):
+            self._check_breaker()
+            if self.limiter is not None:
+                self.limiter.acquire()
+            try:
+                result = fn(*args, **kwargs)
+            except spotipy.exceptions.SpotifyException as e:
+                error = e
+                status = e.http_status
+                if status == 429:
+                    delay = retry_after_seconds(e) or self._backoff(attempt)
+                elif status is None or status >= 500:
+                    self._record_server_error()
+                    delay = self._backoff(attempt)
+                else:
+                    raise
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                error = e
+                status = None
+                self._record_server_error()
+                delay = self._backoff(attempt)
+            else:
+                self._record_success()
+                return result
+
+            if attempt + 1 == self.max_attempts or time.monotonic() + delay > give_up_at:
+                raise RetriesExhausted(f"Gave up after {attempt + 1} attempts: {error}", error)
+            with self._lock:
+                self.retries += 1
+                if status == 429:
+                    self.rate_limited += 1
+                    self.rate_limit_wait += delay
+                if status != 429 or self.limiter is None:
+                    # A 429 with a limiter is waited out in limiter.acquire() instead
+                    self.slept += delay
+            if not self.quiet:
+                reason = "Rate limited" if status == 429 else f"Spotify error ({status or error.__class__.__name__})"
+                print(f"\n{reason}, waiting {delay:.0f}s before retry...", file=sys.stderr, flush=True)
+            if status == 429 and self.limiter is not None:
+                # Holds back every caller, not just this one
+                self.limiter.penalize(delay)
+            else:
+                time.sleep(delay)
@@ -0,0 +1,70 @@
+import csv
+import itertools
+import json
+import os
+from collections import Counter
+from datetime import datetime
+
+# Date layouts found in data/: LLM output with and without a time, and the early ISO dates
+DATE_FORMATS = ('%A %b %d, %Y %I:%M %p', '%A %b %d, %Y', '%Y-%m-%d')
+
+
+def parse_row_date(value):
+    """A schedule row's date as a datetime, or None if it isn't in a known layout"""
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except (ValueError, TypeError):
+            continue
+    return None
+
+
+def majority_month(rows):
+    """The month most of the rows were played in, as 'YYYY-MM', or None if none has a known date"""
+    months = Counter()
+    for row in rows:
+        played = parse_row_date(row.get('date'))
+        if played is not None:
+            months[played.strftime('%Y-%m')] += 1
+    return months.most_common(1)[0][0] if months else None
+
+
+def iter_playlist_data(file_path):
+    """
+    Yield album rows from a JSON or CSV file one at a time. CSV rows are
+    read as they are needed, so a long schedule never sits in memory; a
+    JSON file is a single array and has to be loaded whole.
+    """
+    file_ext = os.path.splitext(file_path)[1].lower()
+
+    if file_ext == '.json':
+        with open(file_path, 'r', encoding='utf-8') as f:
+            yield from json.load(f)
+
+    elif file_ext == '.csv':
+        with open(file_path, 'r', encoding='utf-8') as f:
+            yield from iter_csv_rows(f)
+
+    else:
+        raise ValueError(f"Unsupported file format: {file_ext}")
+
+
+def iter_csv_rows(lines):
+    """Yield dicts from CSV lines (a file or any iterable of lines), converting year to an integer"""
+    for row in csv.DictReader(lines):
+        # Convert year to integer if present
+        if 'year' in row:
+            try:
+                row['year'] = int(row['year'])
+            except (ValueError, TypeError):
+                pass
+        yield row
+
+
+def peek(rows):
+    """Return (first row or None, an iterator over all the rows)"""
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        return None, iter(())
+    return first, itertools.chain([first], rows)
@@ -0,0 +1,202 @@
+import csv
+import re
+from datetime import datetime
+from html.parser import HTMLParser
+
+CSV_HEADER = "date,artist,album,year"
+
+WEEKDAYS = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+# "Dec 4, 2024", "Wednesday, June 4, 2026", "Jun 4" (year taken from context)
+DATE_RE = re.compile(rf"^(?:(?:{'|'.join(WEEKDAYS)}),?\s+)?([A-Z][a-z]{{2,8}})\.?\s+(\d{{1,2}})(?:,?\s+(\d{{4}}))?$")
+# "6:00 PM", "6:00 PM - 8:00 PM", "6:00pm"; only the start time is used
+TIME_RE = re.compile(r"^(\d{1,2}):(\d{2})\s*([AaPp][Mm])\b")
+HOSTED_RE = re.compile(r"^Hosted By:?\s*(.*)$", re.IGNORECASE)
+YEAR_RE = re.compile(r"^\((\d{4})\)$")
+PREFIX_RE = re.compile(r"^Deep Listening\s*[:\-–—]?\s*", re.IGNORECASE)
+
+BLOCK_TAGS = {'address', 'article', 'aside', 'blockquote', 'br', 'dd', 'div', 'dl', 'dt', 'figcaption',
+              'figure', 'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'li',
+              'main', 'nav', 'ol', 'p', 'pre', 'section', 'table', 'td', 'th', 'tr', 'ul'}
+SKIP_TAGS = {'script', 'style', 'noscript', 'template', 'svg'}
+
+
+class ScheduleParseError(Exception):
+    """The page didn't have the structure the parser expects"""
+
+
+class _TextExtractor(HTMLParser):
+    """Collect visible text, breaking lines at block-level elements"""
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self.skipping += 1
+        elif tag in BLOCK_TAGS:
+            self.parts.append('\n')
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self.skipping = max(0, self.skipping - 1)
+        elif tag in BLOCK_TAGS:
+            self.parts.append('\n')
+
+    def handle_data(self, data):
+        if not self.skipping:
+            self.parts.append(data)
+
+
+def html_to_lines(html):
+    """Turn rendered HTML into its non-empty lines of visible text"""
+    extractor = _TextExtractor()
+    extractor.feed(html)
+    extractor.close()
+    text = ''.join(extractor.parts)
+    return [re.sub(r'\s+', ' ', line).strip() for line in text.split('\n') if line.strip()]
+
+
+def parse_month_day(month, day, year):
+    for fmt in ('%b %d %Y', '%B %d %Y'):
+        try:
+            return datetime.strptime(f"{month} {day} {year}", fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def parse_schedule_lines(lines, default_year=None):
+    """
+    Walk the page text the way src/experimental/page_parser.js does: a date
+    line (optionally preceded by a weekday line) and a start time set the
+    current slot, and each "Hosted By:" marker is followed by the artist,
+    the album and "(year)". Returns (sessions, problems); problems lists the
+    markers that couldn't be read.
+    """
+    sessions = []
+    problems = []
+    current_date = None
+    has_time = False
+
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        i += 1
+
+        date_match = DATE_RE.match(line)
+        if date_match:
+            month, day, year = date_match.groups()
+            year = year or default_year
+            parsed = parse_month_day(month, day, year) if year else None
+            if parsed is not None:
+                current_date = parsed
+                has_time = False
+            continue
+
+        time_match = TIME_RE.match(line)
+        if time_match and current_date is not None:
+            hour, minute, meridiem = time_match.groups()
+            clock = datetime.strptime(f"{hour}:{minute} {meridiem.upper()}", '%I:%M %p')
+            current_date = current_date.replace(hour=clock.hour, minute=clock.minute)
+            has_time = True
+            continue
+
+        hosted_match = HOSTED_RE.match(line)
+        if not hosted_match:
+            continue
+        if hosted_match.group(1):
+            # Artist on the same line as the marker
+            following = [hosted_match.group(1)] + lines[i:i + 2]
+            consumed = 2
+        else:
+            following = lines[i:i + 3]
+            consumed = 3
+        if current_date is None:
+            problems.append(f"line {i}: 'Hosted By:' before any date")
+            continue
+        if len(following) < 3 or not YEAR_RE.match(following[2]):
+            problems.append(f"line {i}: expected artist, album and (year) after 'Hosted By:'")
+            continue
+        artist = PREFIX_RE.sub('', following[0]).strip()
+        album = PREFIX_RE.sub('', following[1]).strip()
+        if not artist or not album:
+            problems.append(f"line {i}: empty artist or album")
+            continue
+        sessions.append({
+            'when': current_date,
+            'has_time': has_time,
+            'artist': artist,
+            'album': album,
+            'year': int(YEAR_RE.match(following[2]).group(1)),
+        })
+        # Don't let an album called e.g. "May 1" be read as a date
+        i += consumed
+    return sessions, problems
+
+
+def format_date(when, has_time=True):
+    """Format a slot like the CSVs in data/: 'Wednesday Jun 1, 2026 6:00 PM'"""
+    date = f"{when:%A %b} {when.day}, {when.year}"
+    if not has_time:
+        return date
+    hour = when.hour % 12 or 12
+    return f"{date} {hour}:{when:%M %p}"
+
+
+def parse_schedule_html(html, month=None, year=None):
+    """
+    Extract the sessions in `month` `year` (full month name, e.g. "June")
+    from rendered schedule HTML as date/artist/album/year dicts, sorted by
+    play date with duplicates removed. Raises ScheduleParseError when the
+    page doesn't look like the schedule we know, so callers can fall back
+    to the LLM.
+    """
+    lines = html_to_lines(html)
+    markers = sum(1 for line in lines if HOSTED_RE.match(line))
+    if not markers:
+        raise ScheduleParseError("No 'Hosted By:' entries found - the page layout may have changed")
+
+    sessions, problems = parse_schedule_lines(lines, default_year=year)
+    if problems:
+        raise ScheduleParseError(f"{len(problems)} of {markers} entries could not be parsed "
+                                 f"(first: {problems[0]})")
+
+    if month is not None:
+        sessions = [s for s in sessions if s['when'].strftime('%B') == month]
+    if year is not None:
+        sessions = [s for s in sessions if s['when'].year == int(year)]
+    if not sessions:
+        raise ScheduleParseError(f"Parsed {markers} entries but none are in {month or ''} {year or ''}".strip())
+
+    rows = []
+    seen = set()
+    for session in sorted(sessions, key=lambda s: s['when']):
+        key = (session['when'], session['artist'].lower(), session['album'].lower())
+        if key in seen:
+            continue
+        seen.add(key)
+        rows.append({
+            'date': format_date(session['when'], session['has_time']),
+            'artist': session['artist'],
+            'album': session['album'],
+            'year': session['year'],
+        })
+    return rows
+
+
+def schedule_csv_writer(f):
+    """Write the CSV header to f and return a writer for rows in the same layout the LLM is asked to produce"""
+    f.write(CSV_HEADER + '\n')
+    return csv.writer(f, quoting=csv.QUOTE_NONNUMERIC, lineterminator='\n')
+
+
+def csv_fields(row):
+    return [row['date'], row['artist'], row['album'], row.get('year', '')]
+
+
+def write_schedule_csv(rows, f):
+    """Write rows in the same layout the LLM is asked to produce"""
+    writer = schedule_csv_writer(f)
+    for row in rows:
+        writer.writerow(csv_fields(row))
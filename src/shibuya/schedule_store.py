@@ -0,0 +1,183 @@
+import re
+import sqlite3
+from datetime import date, datetime
+from pathlib import Path
+
+from shibuya.resolution_index import canonical_key
+from shibuya.schedule import iter_playlist_data, majority_month, parse_row_date
+
+STORE_FILE = Path(".schedule_store.sqlite")
+# The scrape date at the end of a file name: -2026-05-20.csv, -20250203.csv
+SCRAPE_DATE_RE = re.compile(r'(\d{4})-?(\d{2})-?(\d{2})\.\w+$')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    path TEXT PRIMARY KEY,
+    month TEXT NOT NULL,
+    scraped TEXT NOT NULL,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    rows INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS plays (
+    source TEXT NOT NULL REFERENCES sources(path) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    played_at TEXT,
+    date TEXT,
+    artist TEXT NOT NULL,
+    album TEXT NOT NULL,
+    year INTEGER,
+    artist_key TEXT NOT NULL,
+    album_key TEXT NOT NULL,
+    PRIMARY KEY (source, position)
+);
+CREATE INDEX IF NOT EXISTS sources_month ON sources (month, scraped);
+CREATE INDEX IF NOT EXISTS plays_artist ON plays (artist_key, played_at);
+CREATE INDEX IF NOT EXISTS plays_album ON plays (artist_key, album_key);
+"""
+
+# Sources that are the newest scrape of their month
+LATEST_SOURCES = """
+SELECT path FROM sources s
+WHERE scraped = (SELECT MAX(scraped) FROM sources WHERE month = s.month)
+"""
+
+
+def scrape_date(path):
+    """When a schedule file was scraped: the date in its name, else its modification date"""
+    match = SCRAPE_DATE_RE.search(Path(path).name)
+    if match:
+        try:
+            return date(*map(int, match.groups())).isoformat()
+        except ValueError:
+            pass
+    return datetime.fromtimestamp(Path(path).stat().st_mtime).date().isoformat()
+
+
+def month_key(value):
+    """'2026-06' from 'June 2026', 'Jun 2026' or '2026-06'"""
+    for fmt in ('%B %Y', '%b %Y', '%Y-%m'):
+        try:
+            return datetime.strptime(value.strip(), fmt).strftime('%Y-%m')
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognised month {value!r} (use e.g. 'June 2026' or 2026-06)")
+
+
+def _row(record):
+    row = {'date': record['date'], 'artist': record['artist'], 'album': record['album']}
+    if record['year'] is not None:
+        row['year'] = record['year']
+    return row
+
+
+class ScheduleStore:
+    """
+    Every scraped schedule in one SQLite file, one row per play (rows
+    without an artist or album are left out). Each row keeps its parsed
+    timestamp, normalised artist/album keys (the same canonical_key the
+    resolution index uses), its source file and that file's scrape date.
+    A source is assigned to the month most of its rows fall in; when a
+    month was scraped several times, queries use the newest scrape, or
+    the newest up to an as-of date.
+
+    Importing is incremental: files whose size and modification time are
+    unchanged are skipped.
+    """
+    def __init__(self, path=STORE_FILE):
+        self.path = Path(path)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.executescript(SCHEMA)
+
+    def _unchanged(self, path):
+        stat = Path(path).stat()
+        source = self.conn.execute("SELECT mtime, size FROM sources WHERE path = ?", (str(path),)).fetchone()
+        return source is not None and source['mtime'] == stat.st_mtime and source['size'] == stat.st_size
+
+    def import_file(self, path):
+        """Load one schedule file, replacing any earlier import of it. Returns its row count, or None if unchanged"""
+        path = Path(path).resolve()
+        if self._unchanged(path):
+            return None
+        stat = path.stat()
+        plays = []
+        rows = []
+        for position, row in enumerate(iter_playlist_data(path), 1):
+            if not row.get('artist') or not row.get('album'):
+                continue
+            rows.append(row)
+            played = parse_row_date(row.get('date'))
+            artist_key, album_key = canonical_key(row['artist'], row['album']).split(':', 1)
+            year = row.get('year') if isinstance(row.get('year'), int) else None
+            plays.append((str(path), position, played.isoformat() if played else None, row.get('date'),
+                          row['artist'], row['album'], year, artist_key, album_key))
+        scraped = scrape_date(path)
+        month = majority_month(rows) or scraped[:7]
+        with self.conn:
+            self.conn.execute("DELETE FROM sources WHERE path = ?", (str(path),))
+            self.conn.execute("INSERT INTO sources VALUES (?, ?, ?, ?, ?, ?)",
+                              (str(path), month, scraped, stat.st_mtime, stat.st_size, len(plays)))
+            self.conn.executemany("INSERT INTO plays VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", plays)
+        return len(plays)
+
+    def import_files(self, paths):
+        """Import every file; returns {path: row count} for the ones that were (re)loaded"""
+        imported = {}
+        for path in paths:
+            count = self.import_file(path)
+            if count is not None:
+                imported[str(path)] = count
+        return imported
+
+    def prune(self, paths):
+        """Forget sources that aren't among `paths` (deleted or renamed files)"""
+        keep = {str(Path(path).resolve()) for path in paths}
+        stale = [row['path'] for row in self.conn.execute("SELECT path FROM sources") if row['path'] not in keep]
+        with self.conn:
+            self.conn.executemany("DELETE FROM sources WHERE path = ?", [(path,) for path in stale])
+        return stale
+
+    def month_source(self, month, as_of=None, paths=None):
+        """
+        The newest scrape of a month ('June 2026' or '2026-06'), up to as_of
+        (YYYY-MM-DD) if given, and among the files in `paths` if given
+        """
+        query = "SELECT * FROM sources WHERE month = ?"
+        params = [month_key(month)]
+        if as_of is not None:
+            query += " AND scraped <= ?"
+            params.append(as_of)
+        if paths is not None:
+            keep = [str(Path(path).resolve()) for path in paths]
+            query += f" AND path IN ({', '.join('?' * len(keep))})"
+            params.extend(keep)
+        return self.conn.execute(query + " ORDER BY scraped DESC, path DESC LIMIT 1", params).fetchone()
+
+    def month_rows(self, month, as_of=None, paths=None):
+        """A month's schedule rows in order, from its newest scrape (see month_source)"""
+        source = self.month_source(month, as_of, paths)
+        if source is None:
+            return []
+        return self.source_rows(source['path'])
+
+    def source_rows(self, path):
+        """The rows imported from one source file, in order"""
+        records = self.conn.execute("SELECT * FROM plays WHERE source = ? ORDER BY position",
+                                    (str(Path(path).resolve()),))
+        return [_row(record) for record in records]
+
+    def artist_plays(self, artist):
+        """Every play of an artist, matched on the normalised name, from the newest scrape of each month"""
+        artist_key = canonical_key(artist, '').split(':', 1)[0]
+        records = self.conn.execute(
+            f"SELECT * FROM plays WHERE artist_key = ? AND source IN ({LATEST_SOURCES}) "
+            "ORDER BY played_at, source, position", (artist_key,))
+        return [dict(_row(record), source=record['source']) for record in records]
+
+    def sources(self):
+        return self.conn.execute("SELECT * FROM sources ORDER BY month, scraped").fetchall()
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,348 @@
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+
+class LogCacheBackend:
+    """
+    Append-only JSON-lines store. Every write is a single appended record and
+    the last record for a key wins, so a set() costs O(1) regardless of cache
+    size. A record torn by a crash only ever affects the tail of the file:
+    everything before it is still read back, and the torn bytes are trimmed
+    on the next load. The file is rewritten only during compaction.
+    """
+    suffix = ".log"
+
+    def __init__(self, path, fsync_every=20, compact_ratio=4, compact_min=200):
+        self.path = Path(path)
+        self.fsync_every = fsync_every
+        self.compact_ratio = compact_ratio
+        self.compact_min = compact_min
+        self._file = None
+        self._pending = 0
+        self._records = 0
+
+    def load(self):
+        """Replay the log into a dict, dropping any half-written tail"""
+        entries = {}
+        self._records = 0
+        if not self.path.exists():
+            return entries
+
+        good_offset = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # Torn final write
+                try:
+                    record = json.loads(line)
+                    key = record['k']
+                except (ValueError, KeyError, TypeError):
+                    # Corrupt record in the middle of the log - skip it
+                    good_offset += len(line)
+                    continue
+                if record.get('d'):
+                    entries.pop(key, None)
+                else:
+                    entries[key] = record['v']
+                self._records += 1
+                good_offset += len(line)
+
+        if good_offset < self.path.stat().st_size:
+            with open(self.path, 'r+b') as f:
+                f.truncate(good_offset)
+
+        if self._records > self.compact_min and self._records > self.compact_ratio * len(entries):
+            self.compact(entries)
+        return entries
+
+    def _append(self, record):
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.write(json.dumps(record, separators=(',', ':')) + '\n')
+        # Flush to the OS on every write so a process crash loses nothing;
+        # only the (comparatively slow) fsync is batched
+        self._file.flush()
+        self._records += 1
+        self._pending += 1
+        if self._pending >= self.fsync_every:
+            self.sync()
+
+    def put(self, key, value):
+        self._append({'k': key, 'v': value})
+
+    def delete(self, key):
+        self._append({'k': key, 'd': True})
+
+    def sync(self):
+        """Force buffered records to disk"""
+        if self._file is not None and self._pending:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._pending = 0
+
+    def compact(self, entries):
+        """Rewrite the log with only the live entries, atomically"""
+        self.close()
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for key, value in entries.items():
+                f.write(json.dumps({'k': key, 'v': value}, separators=(',', ':')) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._records = len(entries)
+
+    def close(self):
+        self.sync()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def remove(self):
+        """Delete the backing file"""
+        self.close()
+        self.path.unlink(missing_ok=True)
+
+
+class SqliteCacheBackend:
+    """SQLite store in WAL mode; commits are batched the same way as fsyncs in the log backend"""
+    suffix = ".sqlite"
+
+    def __init__(self, path, fsync_every=20):
+        self.path = Path(path)
+        self.fsync_every = fsync_every
+        self._conn = None
+        self._pending = 0
+
+    def _connect(self):
+        if self._conn is None:
+            # Cache writes may come from resolver worker threads; callers serialise them
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        return self._conn
+
+    def load(self):
+        conn = self._connect()
+        entries = {}
+        for key, value in conn.execute("SELECT key, value FROM cache"):
+            try:
+                entries[key] = json.loads(value)
+            except ValueError:
+                continue
+        return entries
+
+    def _written(self):
+        self._pending += 1
+        if self._pending >= self.fsync_every:
+            self.sync()
+
+    def put(self, key, value):
+        self._connect().execute("INSERT OR REPLACE INTO cache (key, value) VALUES (?, ?)",
+                                (key, json.dumps(value, separators=(',', ':'))))
+        self._written()
+
+    def delete(self, key):
+        self._connect().execute("DELETE FROM cache WHERE key = ?", (key,))
+        self._written()
+
+    def sync(self):
+        if self._conn is not None:
+            self._conn.commit()
+        self._pending = 0
+
+    def compact(self, entries):
+        self.sync()
+        self._connect().execute("VACUUM")
+
+    def close(self):
+        if self._conn is not None:
+            self.sync()
+            self._conn.close()
+            self._conn = None
+
+    def remove(self):
+        self.close()
+        for suffix in ("", "-wal", "-shm"):
+            Path(f"{self.path}{suffix}").unlink(missing_ok=True)
+
+
+BACKENDS = {
+    'log': LogCacheBackend,
+    'sqlite': SqliteCacheBackend,
+}
+
+LEGACY_CACHE_FILE = Path(".search_cache.pkl")
+
+DAY = 24 * 60 * 60
+# Found albums rarely change; "not found" can change as catalogues grow;
+# failures (rate limits exhausted, unexpected errors) are almost always transient
+POSITIVE_TTL = 180 * DAY
+NEGATIVE_TTL = 14 * DAY
+FAILURE_TTL = 60 * 60
+MAX_ENTRIES = 10000
+
+
+class SearchCache:
+    """
+    Cache search results to avoid repeated API calls.
+
+    Each entry carries the time it was stored. Found albums, empty results
+    and failed searches expire after separate TTLs (None disables expiry),
+    and once the cache holds max_entries the least recently used entries are
+    evicted. Each entry also records when it was last read; hits are saved
+    in one batch on close() and the cache is reloaded in that order, so
+    eviction stays least-recently-used across runs. invalidate() drops
+    entries selectively by artist, album or age.
+    """
+    def __init__(self, cache_file=None, backend='log', positive_ttl=POSITIVE_TTL, negative_ttl=NEGATIVE_TTL,
+                 failure_ttl=FAILURE_TTL, max_entries=MAX_ENTRIES):
+        backend_class = BACKENDS[backend]
+        if cache_file is None:
+            cache_file = f".search_cache{backend_class.suffix}"
+        self.cache_file = Path(cache_file)
+        self.backend = backend_class(self.cache_file)
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.failure_ttl = failure_ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._touched = set()  # keys read since the last save, whose 'used' time is unsaved
+        self.cache = self._load_cache()
+        self._evict()
+
+    def _load_cache(self):
+        """Load cache from disk, importing the old pickle cache on first use"""
+        cache = OrderedDict()
+        for key, value in self.backend.load().items():
+            cache[key] = self._entry(value)
+        if not cache and LEGACY_CACHE_FILE.exists():
+            try:
+                with open(LEGACY_CACHE_FILE, 'rb') as f:
+                    legacy = pickle.load(f)
+            except Exception:
+                legacy = {}
+            for key, value in legacy.items():
+                cache[key] = self._entry(value)
+                self.backend.put(key, cache[key])
+            self.backend.sync()
+        # Least recently used first, whatever order the backend stored them in
+        return OrderedDict(sorted(cache.items(), key=lambda item: item[1].get('used', item[1]['stored'])))
+
+    @staticmethod
+    def _entry(value):
+        """Wrap bare results from older caches, which carry no timestamp"""
+        if isinstance(value, dict) and 'result' in value:
+            return value
+        # Untimed hits are kept; untimed misses may hide an old rate limit, so expire them
+        return {'result': value, 'stored': time.time() if value else 0, 'failed': False}
+
+    def _ttl(self, entry):
+        if entry.get('failed'):
+            return self.failure_ttl
+        return self.positive_ttl if entry['result'] else self.negative_ttl
+
+    def _expired(self, entry, now):
+        ttl = self._ttl(entry)
+        return ttl is not None and now - entry['stored'] > ttl
+
+    def _evict(self):
+        """Drop least recently used entries beyond max_entries"""
+        if self.max_entries is None:
+            return
+        with self._lock:
+            while len(self.cache) > self.max_entries:
+                key, _ = self.cache.popitem(last=False)
+                self.backend.delete(key)
+
+    def get(self, artist, album):
+        """Get cached result for artist:album, or None if missing or expired"""
+        key = f"{artist.lower()}:{album.lower()}"
+        with self._lock:
+            entry = self.cache.get(key)
+            if entry is not None and self._expired(entry, time.time()):
+                del self.cache[key]
+                self.backend.delete(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.cache.move_to_end(key)
+            entry['used'] = time.time()
+            self._touched.add(key)
+            self.hits += 1
+            return entry['result']
+
+    def set(self, artist, album, result, failed=False):
+        """Cache a search result; failed marks an empty result caused by an error"""
+        key = f"{artist.lower()}:{album.lower()}"
+        now = time.time()
+        entry = {'result': result, 'stored': now, 'used': now, 'failed': failed}
+        with self._lock:
+            self.cache[key] = entry
+            self.cache.move_to_end(key)
+            self._touched.discard(key)
+            self.backend.put(key, entry)
+        self._evict()
+
+    def invalidate(self, artist=None, album=None, older_than=None, misses_only=False):
+        """
+        Remove matching entries and return how many were dropped. artist and
+        album match case-insensitively; older_than is an age in seconds.
+        With no arguments nothing is removed - use clear() for that.
+        """
+        if artist is None and album is None and older_than is None and not misses_only:
+            return 0
+        now = time.time()
+        with self._lock:
+            doomed = []
+            for key, entry in self.cache.items():
+                if artist is not None and not key.startswith(f"{artist.lower()}:"):
+                    continue
+                if album is not None and not key.endswith(f":{album.lower()}"):
+                    continue
+                if older_than is not None and now - entry['stored'] <= older_than:
+                    continue
+                if misses_only and entry['result']:
+                    continue
+                doomed.append(key)
+            for key in doomed:
+                del self.cache[key]
+                self.backend.delete(key)
+            self.backend.sync()
+        return len(doomed)
+
+    def size(self):
+        """Return cache size"""
+        return len(self.cache)
+
+    def compact(self):
+        """Drop superseded records from the backing store"""
+        with self._lock:
+            self.backend.compact(self.cache)
+
+    def close(self):
+        """Save the read times of this run's hits, flush pending writes and release the backing store"""
+        with self._lock:
+            for key in self._touched:
+                if key in self.cache:
+                    self.backend.put(key, self.cache[key])
+            self._touched = set()
+            self.backend.close()
+
+    def clear(self):
+        """Remove every entry, including the on-disk store"""
+        with self._lock:
+            self.backend.remove()
+            LEGACY_CACHE_FILE.unlink(missing_ok=True)
+            self.cache = OrderedDict()
+            self._touched = set()
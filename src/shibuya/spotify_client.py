@@ -0,0 +1,107 @@
+import os
+
+import requests
+import spotipy
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from spotipy.oauth2 import SpotifyClientCredentials, SpotifyOAuth
+
+# Scope for accessing playlists
+SCOPE = 'playlist-modify-public'
+
+# HTTP settings, overridable in .env
+DEFAULT_POOL_SIZE = 16
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 20.0
+
+
+def _env_number(name, default, cast=float):
+    value = os.getenv(name)
+    if not value:
+        return default
+    try:
+        return cast(value)
+    except ValueError:
+        print(f"WARNING: ignoring {name}={value!r} in .env, using {default}")
+        return default
+
+
+def http_settings():
+    """Pool size and (connect, read) timeouts from .env, with defaults"""
+    load_dotenv()
+    pool_size = _env_number("HTTP_POOL_SIZE", DEFAULT_POOL_SIZE, int)
+    timeout = (_env_number("HTTP_CONNECT_TIMEOUT", DEFAULT_CONNECT_TIMEOUT),
+               _env_number("HTTP_READ_TIMEOUT", DEFAULT_READ_TIMEOUT))
+    return pool_size, timeout
+
+
+def create_session(pool_size=DEFAULT_POOL_SIZE):
+    """
+    A keep-alive session for the Spotify API. The pool is sized for the
+    worker threads and concurrent fallback searches, so connections are
+    reused instead of re-opened. The adapter does no retries of its own:
+    429s and 5xx come back as responses, with their Retry-After header,
+    and RetryPolicy decides what to do. requests already negotiates gzip.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size, max_retries=0)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers['Connection'] = 'keep-alive'
+    return session
+
+
+def _credentials():
+    """CLIENT_ID and CLIENT_SECRET from .env, or None after explaining what's missing"""
+    load_dotenv()
+
+    # Spotify Developer Credentials
+    CLIENT_ID = os.getenv("CLIENT_ID")
+    CLIENT_SECRET = os.getenv("CLIENT_SECRET")
+
+    if not CLIENT_ID or not CLIENT_SECRET:
+        print("ERROR: SPOTIFY_CLIENT_ID and CLIENT_SECRET not found in .env")
+        print("Please set these environment variables in your .env file")
+        return None
+    return CLIENT_ID, CLIENT_SECRET
+
+
+def create_client(scope=SCOPE):
+    """Build an authenticated Spotify client from the credentials in .env, or None if they're missing"""
+    credentials = _credentials()
+    if credentials is None:
+        return None
+    CLIENT_ID, CLIENT_SECRET = credentials
+    REDIRECT_URI = os.getenv("REDIRECT_URI", 'https://localhost:8888/callback')
+    pool_size, timeout = http_settings()
+
+    # Authenticate with Spotify
+    # Disable built-in retries for development mode (too aggressive)
+    return spotipy.Spotify(auth_manager=SpotifyOAuth(client_id=CLIENT_ID,
+                                                     client_secret=CLIENT_SECRET,
+                                                     redirect_uri=REDIRECT_URI,
+                                                     scope=scope,
+                                                     requests_timeout=timeout),
+                           requests_session=create_session(pool_size),
+                           requests_timeout=timeout,
+                           retries=0)  # Disable auto-retries; we handle them manually
+
+
+def create_read_client():
+    """
+    Build a client for catalogue reads (search, albums, track listings)
+    with an app token from the client-credentials flow. It needs no user
+    login, so dry runs and cache warming never open a browser, and it has
+    its own connection pool separate from the playlist-writing client.
+    """
+    credentials = _credentials()
+    if credentials is None:
+        return None
+    CLIENT_ID, CLIENT_SECRET = credentials
+    pool_size, timeout = http_settings()
+    return spotipy.Spotify(auth_manager=SpotifyClientCredentials(client_id=CLIENT_ID,
+                                                                 client_secret=CLIENT_SECRET,
+                                                                 requests_timeout=timeout),
+                           requests_session=create_session(pool_size),
+                           requests_timeout=timeout,
+                           retries=0)
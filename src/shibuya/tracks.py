@@ -0,0 +1,108 @@
+import spotipy
+
+from shibuya.retry import RetriesExhausted, RetryPolicy
+
+# Spotify's multi-album endpoint accepts at most 20 ids per call
+MAX_ALBUMS_PER_CALL = 20
+# album_tracks pages hold at most 50 tracks
+MAX_TRACKS_PER_PAGE = 50
+
+
+class TrackLister:
+    """
+    Look up album track URIs with as few calls as possible. Albums are
+    fetched 20 at a time through sp.albums, whose responses already contain
+    the first page of tracks; album_tracks is only called for albums with
+    more than 50 tracks. Listings are remembered for the rest of the run,
+    and across runs when a resolution index is given.
+    """
+    def __init__(self, sp, policy=None, index=None):
+        self.sp = sp
+        self.policy = policy or RetryPolicy()
+        self.index = index
+        self.known = {}
+        self.batch_supported = True
+
+    def _remaining_pages(self, album_id, uris, total):
+        """Follow album_tracks pagination for albums longer than one page"""
+        while len(uris) < total:
+            page = self.policy.call(self.sp.album_tracks, album_id, limit=MAX_TRACKS_PER_PAGE, offset=len(uris))
+            if not page['items']:
+                break
+            uris.extend(track['uri'] for track in page['items'])
+        return uris
+
+    def _fetch_single(self, album_id):
+        page = self.policy.call(self.sp.album_tracks, album_id, limit=MAX_TRACKS_PER_PAGE)
+        uris = [track['uri'] for track in page['items']]
+        return self._remaining_pages(album_id, uris, page.get('total', len(uris)))
+
+    def fetch(self, album_ids):
+        """Return {album_id: [track uri, ...]} for every id"""
+        if self.index is not None:
+            for album_id in album_ids:
+                if album_id not in self.known:
+                    uris = self.index.tracks(album_id)
+                    if uris is not None:
+                        self.known[album_id] = uris
+        missing = [album_id for album_id in dict.fromkeys(album_ids) if album_id not in self.known]
+        for start in range(0, len(missing), MAX_ALBUMS_PER_CALL):
+            batch = missing[start:start + MAX_ALBUMS_PER_CALL]
+            if self.batch_supported:
+                try:
+                    response = self.policy.call(self.sp.albums, batch)
+                except spotipy.exceptions.SpotifyException as e:
+                    if e.http_status not in (403, 404):
+                        raise
+                    # Some app tiers can't use the multi-album endpoint
+                    self.batch_supported = False
+                else:
+                    for album_id, album in zip(batch, response['albums']):
+                        if album is None:
+                            self.known[album_id] = []
+                            continue
+                        tracks = album['tracks']
+                        uris = [track['uri'] for track in tracks['items']]
+                        self.known[album_id] = self._remaining_pages(album_id, uris, tracks.get('total', len(uris)))
+                    continue
+            for album_id in batch:
+                self.known[album_id] = self._fetch_single(album_id)
+        if self.index is not None:
+            for album_id in missing:
+                self.index.record_tracks(album_id, self.known[album_id])
+        return {album_id: self.known[album_id] for album_id in album_ids}
+
+    def _is_known(self, album_id):
+        if album_id in self.known:
+            return True
+        return self.index is not None and self.index.tracks(album_id) is not None
+
+    def attach(self, rows, batch_size=MAX_ALBUMS_PER_CALL):
+        """
+        Take (row, albums_found) pairs in schedule order and yield
+        (row, albums_found, track_uris), fetching listings a batch at a time.
+        track_uris is None when the album wasn't found or its listing failed.
+        """
+        pending = []
+
+        def drain():
+            ids = [albums_found[0]['id'] for _, albums_found in pending if albums_found]
+            try:
+                listings = self.fetch(ids)
+            except (RetriesExhausted, spotipy.exceptions.SpotifyException):
+                listings = {}
+            for row, albums_found in pending:
+                uris = listings.get(albums_found[0]['id']) if albums_found else None
+                yield row, albums_found, uris
+            pending.clear()
+
+        batch_ids = set()
+        for row, albums_found in rows:
+            pending.append((row, albums_found))
+            if albums_found and not self._is_known(albums_found[0]['id']):
+                batch_ids.add(albums_found[0]['id'])
+            # Rows that need no lookup are passed straight through
+            if not batch_ids or len(batch_ids) >= batch_size:
+                yield from drain()
+                batch_ids.clear()
+        yield from drain()
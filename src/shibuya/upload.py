@@ -0,0 +1,270 @@
+from collections import deque
+from datetime import datetime
+
+from shibuya.journal import RunJournal, row_key
+from shibuya.playlist_sync import apply_sync, describe_ops, fetch_playlist_uris, plan_sync
+from shibuya.playlist_writer import PlaylistWriter
+from shibuya.resolver import resolve_albums
+from shibuya.retry import RetriesExhausted
+from shibuya.schedule import parse_row_date
+from shibuya.tracks import TrackLister
+
+
+def playlist_month_year(first_row):
+    """The month a schedule covers, from its first row (e.g. 'June 2026')"""
+    played = parse_row_date(first_row.get('date'))
+    return (played or datetime.now()).strftime('%B %Y')
+
+
+def default_playlist_name(month_year):
+    return f"Shibuya Hi-fi room, {month_year}"
+
+
+def _total(albums):
+    """Row count if the rows are a list, None if they are still being produced"""
+    return len(albums) if hasattr(albums, '__len__') else None
+
+
+def _progress(i, total, album):
+    album_name = album['album'][:40].ljust(40)
+    artist_name = album['artist'][:20].ljust(20)
+    counter = f"{i:2d}/{total}" if total is not None else f"{i:3d}"
+    return f"[{counter}] {album_name} {artist_name}"
+
+
+def print_failures(failed_albums, heading="Failed to find:"):
+    print(f"\n{heading}")
+    for album_name, artist_name, reason in failed_albums:
+        print(f"  • {album_name} by {artist_name} ({reason})")
+
+
+def sync_playlist(sp, albums, playlist_id, cache, index, policy, workers=4, dry_run=False, read_sp=None,
+                  read_policy=None):
+    """
+    Update an existing playlist to match the schedule; see playlist_sync.plan_sync.
+    Albums are looked up through read_sp/read_policy when given, else through sp.
+    """
+    read_sp = read_sp or sp
+    read_policy = read_policy or policy
+    # Build the track list the playlist should end up with
+    total = _total(albums)
+    target_uris = []
+    failed_albums = []
+    tracks = TrackLister(read_sp, read_policy, index)
+    resolved = enumerate(resolve_albums(read_sp, albums, cache, read_policy, workers=workers, index=index), 1)
+    rows = (((i, album), albums_found) for i, (album, albums_found) in resolved)
+    for (i, album), albums_found, track_uris in tracks.attach(rows):
+        print(_progress(i, total, album), end=" ", flush=True)
+        if not albums_found:
+            print(f"✗")
+            failed_albums.append((album['album'], album['artist'], "not found"))
+        elif track_uris is None:
+            print(f"✗")
+            failed_albums.append((album['album'], album['artist'], "rate limited"))
+        else:
+            target_uris.extend(track_uris)
+            print(f"✓")
+
+    try:
+        current_uris = fetch_playlist_uris(sp, playlist_id, policy)
+    except RetriesExhausted as e:
+        print(f"\nERROR: Could not read playlist {playlist_id}: {e}")
+        return False
+    ops = plan_sync(current_uris, target_uris)
+
+    print(f"\n{'='*70}")
+    print(f"Playlist has {len(current_uris)} tracks, schedule has {len(target_uris)}")
+    print(f"Changes: {describe_ops(ops)}")
+    if failed_albums:
+        print_failures(failed_albums)
+    ok = True
+    if any(reason != "not found" for _, _, reason in failed_albums):
+        # Applying now would strip tracks of albums we merely failed to look up
+        print("\nNot syncing: some albums could not be looked up, re-run once the rate limit clears")
+        ok = False
+    elif dry_run:
+        print("\nDry run: playlist not modified")
+    elif ops:
+        try:
+            calls = apply_sync(sp, playlist_id, ops, policy)
+            print(f"\n✓ Playlist synced ({calls} API calls)")
+        except RetriesExhausted as e:
+            # Nothing is lost: re-running the sync re-plans from the playlist's current state
+            print(f"\nERROR: Sync stopped part-way: {e}")
+            print("Re-run the same command to finish it")
+            ok = False
+    else:
+        print("\n✓ Playlist already up to date")
+    print(f"\nPlaylist: https://open.spotify.com/playlist/{playlist_id}")
+    return ok
+
+
+def dry_run_albums(sp, albums, playlist_name, cache, index, policy, workers=4, rate=1.0, check_tracks=False):
+    """Search for each album without creating a playlist or adding tracks"""
+    print("=== DRY RUN MODE ===")
+    print(f"Playlist: '{playlist_name}'")
+    total = _total(albums)
+    if total is not None:
+        print(f"Albums: {total} | Cache: {cache.size()} entries | Index: {index.size()} albums")
+        # One search per album, plus its track listing with --check-tracks
+        calls = total * (2 if check_tracks else 1)
+        print(f"Estimated time: ~{calls / rate / 60:.0f} minutes (uncached)\n")
+    else:
+        print(f"Cache: {cache.size()} entries | Index: {index.size()} albums\n")
+
+    # Track listings are only fetched when explicitly asked for; the search
+    # results already carry each album's track count.
+    found_count = 0
+    track_total = 0
+    failed_albums = []
+    rows_seen = 0
+    resolved = enumerate(resolve_albums(sp, albums, cache, policy, workers=workers, index=index, dry_run=True), 1)
+    rows = (((i, album), albums_found) for i, (album, albums_found) in resolved)
+    if check_tracks:
+        rows = TrackLister(sp, policy, index).attach(rows)
+    else:
+        rows = ((row, albums_found, None) for row, albums_found in rows)
+    for (i, album), albums_found, track_uris in rows:
+        print(_progress(i, total, album), end=" ", flush=True)
+        if not albums_found:
+            print(f"✗")
+            failed_albums.append((album['album'], album['artist'], "not found"))
+        elif check_tracks and track_uris is None:
+            print(f"✗")
+            failed_albums.append((album['album'], album['artist'], "rate limited"))
+        else:
+            found_artist = albums_found[0]['artists'][0]['name']
+            found_album = albums_found[0]['name']
+            if track_uris is not None:
+                track_total += len(track_uris)
+            else:
+                track_total += albums_found[0].get('total_tracks', 0)
+            print(f"✓")
+            found_count += 1
+            if found_artist != album['artist'] or found_album != album['album']:
+                print(f"     → Found: '{found_album}' by {found_artist}")
+        rows_seen = i
+
+    print(f"\n{'='*70}")
+    print(f"Result: {found_count}/{rows_seen} albums found ({track_total} tracks)")
+    if failed_albums:
+        print_failures(failed_albums)
+    print(f"\nCache: {cache.size()} entries")
+    return True
+
+
+def upload_albums(sp, albums, input_file, playlist_name, month_year, cache, index, policy, workers=4,
+                  resume=False, read_sp=None, read_policy=None, journal_key=None):
+    """
+    Create the playlist and add every album's tracks in schedule order,
+    journalling progress against `input_file` (or `journal_key`, see
+    RunJournal) so --resume can finish an interrupted run. `albums` may be a generator; rows are resolved and
+    written as they arrive. Searches and track listings go through
+    read_sp/read_policy when given, so only playlist writes use the user's
+    client. Returns False if anything couldn't be added.
+    """
+    read_sp = read_sp or sp
+    read_policy = read_policy or policy
+    journal = RunJournal(input_file, playlist_name, key=journal_key)
+    if resume and journal.load():
+        if journal.complete:
+            print(f"Nothing to resume: '{playlist_name}' is already complete")
+            print(f"\nPlaylist: https://open.spotify.com/playlist/{journal.playlist_id}")
+            return True
+        playlist_id = journal.playlist_id
+        partly = f", {len(journal.partial)} part-way" if journal.partial else ""
+        print(f"Resuming playlist: '{playlist_name}' ({len(journal.added)} albums already added{partly})\n")
+    else:
+        if resume:
+            print("No unfinished run found for this file and playlist, starting a new one.")
+        elif journal.load() and not journal.complete:
+            print("Note: an unfinished run exists for this playlist; pass --resume to continue it.")
+
+        # Create a new playlist
+        print(f"Creating playlist: '{playlist_name}'")
+        playlist_description = f"Shibuya Hifi Room, Seattle - {month_year} playlist"
+        try:
+            playlist = policy.call(sp.current_user_playlist_create, name=playlist_name,
+                                   public=True, description=playlist_description)
+        except RetriesExhausted as e:
+            print(f"ERROR: Could not create playlist: {e}")
+            return False
+        playlist_id = playlist['id']
+        journal.start(playlist_id)
+        print(f"✓ Playlist created\n")
+
+    total = _total(albums)
+    counts = {'rows': 0, 'skipped': 0}
+    # Row numbers of the rows handed to the resolver, which yields in order
+    order = deque()
+
+    def pending():
+        # Rows whose tracks already made it into the playlist are skipped
+        for i, album in enumerate(albums, 1):
+            counts['rows'] = i
+            if row_key(i, album) in journal.added:
+                counts['skipped'] += 1
+                continue
+            order.append(i)
+            yield album
+
+    def label_key(label):
+        i, album_name, artist_name = label
+        return row_key(i, {'album': album_name, 'artist': artist_name})
+
+    def record_written(labels):
+        journal.mark_added(label_key(label) for label in labels)
+
+    # Tracks a row had already written before this run, so its partial
+    # count stays relative to the whole album
+    written_before = {}
+
+    def record_progress(progress):
+        journal.mark_partial({label_key(label): written_before.get(label[0], 0) + count
+                              for label, count in progress.items()})
+
+    # Search for each album and queue its tracks; the writer adds them
+    # to the playlist 100 at a time in schedule order
+    writer = PlaylistWriter(sp, playlist_id, policy, on_written=record_written, on_progress=record_progress)
+    added_count = 0
+    failed_albums = []
+    tracks = TrackLister(read_sp, read_policy, index)
+    resolved = resolve_albums(read_sp, pending(), cache, read_policy, workers=workers, index=index)
+    rows = (((order.popleft(), album), albums_found) for album, albums_found in resolved)
+    for (i, album), albums_found, track_uris in tracks.attach(rows):
+        print(_progress(i, total, album), end=" ", flush=True)
+        if not albums_found:
+            print(f"✗")
+            failed_albums.append((album['album'], album['artist'], "not found"))
+        elif track_uris is None:
+            print(f"✗")
+            failed_albums.append((album['album'], album['artist'], "rate limited"))
+        else:
+            # A row cut off part-way last time only needs the rest of its tracks
+            written_before[i] = journal.partial.get(row_key(i, album), 0)
+            writer.add(track_uris[written_before[i]:], label=(i, album['album'], album['artist']))
+            found_artist = albums_found[0]['artists'][0]['name']
+            found_album = albums_found[0]['name']
+            print(f"✓")
+            added_count += 1
+            if found_artist != album['artist'] or found_album != album['album']:
+                print(f"     → Found: '{found_album}' by {found_artist}")
+
+    writer.flush()
+    added_count += counts['skipped']
+    for _, album_name, artist_name in writer.failed:
+        added_count -= 1
+        failed_albums.append((album_name, artist_name, "playlist write failed"))
+
+    # Leave the journal open while anything is missing so --resume can retry it
+    if not failed_albums:
+        journal.finish()
+
+    print(f"\n{'='*70}")
+    print(f"Complete: {added_count}/{counts['rows']} albums added "
+          f"({writer.written} tracks in {writer.calls} playlist writes)")
+    if failed_albums:
+        print_failures(failed_albums, "Failed to add:")
+        print(f"\nRe-run with --resume to retry only these albums")
+    print(f"\nPlaylist: https://open.spotify.com/playlist/{playlist_id}")
+    return not failed_albums
@@ -1,168 +1,28 @@
-import spotipy
-from spotipy.oauth2 import SpotifyOAuth
-from dotenv import load_dotenv
-import os
 import argparse
-import re
-import json
-import csv
+import glob
 from datetime import datetime
-import time
-import sys
-import pickle
-from pathlib import Path
 
+from shibuya.cli import add_api_arguments, check_rates, create_clients, create_policies, create_stats
+from shibuya.resolution_index import ResolutionIndex
+from shibuya.schedule import iter_playlist_data, peek
+from shibuya.schedule_store import ScheduleStore, month_key
+from shibuya.search_cache import SearchCache, DAY, NEGATIVE_TTL, POSITIVE_TTL
+from shibuya.upload import default_playlist_name, dry_run_albums, playlist_month_year, sync_playlist, upload_albums
 
-def clean_string(s):
-    """Remove non-alphanumeric characters and return lowercase string"""
-    return re.sub(r'[^a-zA-Z0-9\s]', '', s).lower()
-
-
-class SearchCache:
-    """Cache search results to avoid repeated API calls"""
-    def __init__(self, cache_file=".search_cache.pkl"):
-        self.cache_file = Path(cache_file)
-        self.cache = self._load_cache()
-
-    def _load_cache(self):
-        """Load cache from disk if it exists"""
-        if self.cache_file.exists():
-            try:
-                with open(self.cache_file, 'rb') as f:
-                    return pickle.load(f)
-            except Exception:
-                return {}
-        return {}
-
-    def _save_cache(self):
-        """Save cache to disk"""
-        with open(self.cache_file, 'wb') as f:
-            pickle.dump(self.cache, f)
-
-    def get(self, artist, album):
-        """Get cached result for artist:album"""
-        key = f"{artist.lower()}:{album.lower()}"
-        return self.cache.get(key)
-
-    def set(self, artist, album, result):
-        """Cache a search result"""
-        key = f"{artist.lower()}:{album.lower()}"
-        self.cache[key] = result
-        self._save_cache()
-
-    def size(self):
-        """Return cache size"""
-        return len(self.cache)
-
-
-def load_playlist_data(file_path):
-    """
-    Load playlist data from a file. Supports both JSON and CSV formats.
-    Returns a list of dictionaries containing album information.
-    """
-    file_ext = os.path.splitext(file_path)[1].lower()
-
-    if file_ext == '.json':
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-
-    elif file_ext == '.csv':
-        albums = []
-        with open(file_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                # Convert year to integer if present
-                if 'year' in row:
-                    try:
-                        row['year'] = int(row['year'])
-                    except (ValueError, TypeError):
-                        pass
-                albums.append(row)
-        return albums
-
-    else:
-        raise ValueError(f"Unsupported file format: {file_ext}")
-
-
-def search_album(sp, artist, album, cache, dry_run=False, retry_count=0, max_retries=2):
-    """Search for album with caching and smart retry logic"""
-    # Check cache first
-    cached_result = cache.get(artist, album)
-    if cached_result is not None:
-        return cached_result
 
+def store_schedule(month, as_of=None):
+    """(source file, rows) for a month from the schedule store, importing data/ first; None if there's no schedule"""
+    store = ScheduleStore()
     try:
-        # Try simplified search first (less restrictive, works more often)
-        simplified_query = f"{artist} {album}"
-        simplified_query = clean_string(simplified_query)
-        results = sp.search(q=simplified_query, type='album', limit=1, offset=0)
-        albums_found = results['albums']['items']
-
-        if not albums_found:
-            # Try with "Vol." variations (Volume I → Vol.1, etc)
-            album_with_vol = album.replace("Volume ", "Vol.")
-            if album_with_vol != album:
-                simplified_query = f"{artist} {album_with_vol}"
-                simplified_query = clean_string(simplified_query)
-                time.sleep(5)
-                results = sp.search(q=simplified_query, type='album', limit=1, offset=0)
-                albums_found = results['albums']['items']
-
-        if not albums_found:
-            # Try with/without "The" prefix on artist name
-            if not artist.startswith("The "):
-                artist_with_the = f"The {artist}"
-                simplified_query = f"{artist_with_the} {album}"
-                simplified_query = clean_string(simplified_query)
-                time.sleep(5)
-                results = sp.search(q=simplified_query, type='album', limit=1, offset=0)
-                albums_found = results['albums']['items']
-            elif artist.startswith("The "):
-                artist_without_the = artist[4:]
-                simplified_query = f"{artist_without_the} {album}"
-                simplified_query = clean_string(simplified_query)
-                time.sleep(5)
-                results = sp.search(q=simplified_query, type='album', limit=1, offset=0)
-                albums_found = results['albums']['items']
-
-        # Cache the result (even if empty) to avoid re-searching
-        cache.set(artist, album, albums_found)
-        return albums_found
-
-    except spotipy.exceptions.SpotifyException as e:
-        error_str = str(e).lower()
-
-        # Check for rate limit (429) or gateway errors (502)
-        if e.http_status == 429 or "502" in error_str:
-            # Extract Retry-After header from response if available
-            retry_after = None
-            if hasattr(e, 'headers') and e.headers:
-                retry_after = e.headers.get('Retry-After')
-                if retry_after:
-                    try:
-                        retry_after = int(retry_after)
-                    except (ValueError, TypeError):
-                        retry_after = None
-
-            # Fall back to exponential backoff if no header
-            if not retry_after:
-                retry_after = 2 ** (retry_count + 1)  # 2, 4, 8 seconds
-
-            if retry_count < max_retries:
-                if not dry_run:
-                    print(f"\nRate limited, waiting {retry_after}s before retry...", file=sys.stderr, flush=True)
-                time.sleep(retry_after)
-                return search_album(sp, artist, album, cache, dry_run, retry_count + 1, max_retries)
-            else:
-                # Cache failure so we don't retry endlessly
-                cache.set(artist, album, [])
-                return []
-        else:
-            raise
-    except Exception as e:
-        # Unexpected error - cache and skip
-        cache.set(artist, album, [])
-        return []
+        store.import_files(sorted(glob.glob('data/*.csv')))
+        source = store.month_source(month, as_of)
+        if source is None:
+            print(f"No schedule for {month} in the store" + (f" scraped by {as_of}" if as_of else ""))
+            return None
+        print(f"Using {source['path']} (scraped {source['scraped']})")
+        return source['path'], store.month_rows(month, as_of)
+    finally:
+        store.close()
 
 
 def main():
@@ -172,152 +32,126 @@ def main():
                         help='Perform a dry run without creating playlist or adding tracks')
     parser.add_argument('--clear-cache', action='store_true',
                         help='Clear the search cache before running')
-    parser.add_argument('--input-file', required=True,
-                        help='Path to input file (JSON or CSV) containing album list')
+    parser.add_argument('--cache-ttl-days', type=float, default=POSITIVE_TTL / DAY,
+                        help='Days before a found album is searched again (default: %(default)g)')
+    parser.add_argument('--miss-ttl-days', type=float, default=NEGATIVE_TTL / DAY,
+                        help='Days before an album that wasn\'t found is searched again (default: %(default)g)')
+    parser.add_argument('--invalidate-artist', metavar='ARTIST',
+                        help='Drop cached results for this artist (combine with --invalidate-album to narrow)')
+    parser.add_argument('--invalidate-album', metavar='ALBUM',
+                        help='Drop cached results for this album')
+    parser.add_argument('--invalidate-older-than', type=float, metavar='DAYS',
+                        help='Drop cached results older than this many days')
+    parser.add_argument('--invalidate-misses', action='store_true',
+                        help='Drop cached "not found" results so they are searched again')
+    parser.add_argument('--input-file',
+                        help='Path to input file (JSON or CSV) containing album list (required unless only '
+                             'clearing or invalidating the cache)')
+    parser.add_argument('--month',
+                        help="Take the albums for this month (e.g. 'June 2026') from the schedule store instead of "
+                             "--input-file; new or changed files in data/ are imported first")
+    parser.add_argument('--as-of', metavar='YYYY-MM-DD',
+                        help='With --month, use the newest scrape made on or before this date')
     parser.add_argument('--playlist-name',
                         help='Name for the playlist (optional, defaults to month-based name)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue an interrupted upload of the same file into the same playlist')
+    parser.add_argument('--check-tracks', action='store_true',
+                        help='In a dry run, also fetch each album\'s track listing')
+    parser.add_argument('--sync', metavar='PLAYLIST_ID',
+                        help='Update an existing playlist to match the input file instead of creating a new one')
+    add_api_arguments(parser)
     args = parser.parse_args()
 
-    # Clear cache if requested
-    if args.clear_cache:
-        cache_file = Path(".search_cache.pkl")
-        if cache_file.exists():
-            cache_file.unlink()
-            print("Cache cleared.\n")
-
-    load_dotenv()
-
-    # Spotify Developer Credentials
-    CLIENT_ID = os.getenv("CLIENT_ID")
-    CLIENT_SECRET = os.getenv("CLIENT_SECRET")
-    REDIRECT_URI = os.getenv("REDIRECT_URI", 'https://localhost:8888/callback')
-
-    if not CLIENT_ID or not CLIENT_SECRET:
-        print("ERROR: SPOTIFY_CLIENT_ID and CLIENT_SECRET not found in .env")
-        print("Please set these environment variables in your .env file")
-        return
-
-    # Scope for accessing playlists
-    SCOPE = 'playlist-modify-public'
-
-    # Authenticate with Spotify
-    # Disable built-in retries for development mode (too aggressive)
-    sp = spotipy.Spotify(auth_manager=SpotifyOAuth(client_id=CLIENT_ID,
-                                                   client_secret=CLIENT_SECRET,
-                                                   redirect_uri=REDIRECT_URI,
-                                                   scope=SCOPE),
-                        retries=0)  # Disable auto-retries; we handle them manually
+    invalidating = (args.invalidate_artist or args.invalidate_album
+                    or args.invalidate_older_than is not None or args.invalidate_misses)
+    if args.input_file and args.month:
+        parser.error("use either --input-file or --month")
+    if not (args.input_file or args.month) and not (invalidating or args.clear_cache):
+        parser.error("--input-file or --month is required")
+    check_rates(parser, args)
+    if args.month:
+        try:
+            args.month = month_key(args.month)
+        except ValueError as e:
+            parser.error(str(e))
 
     # Initialize search cache
-    cache = SearchCache()
-
-    try:
-        # Load albums from file
-        albums = load_playlist_data(args.input_file)
-    except Exception as e:
-        print(f"Error loading playlist data: {e}")
-        return
-
-    # Determine month_year for description (always needed)
+    cache = SearchCache(backend=args.cache_backend,
+                        positive_ttl=args.cache_ttl_days * DAY,
+                        negative_ttl=args.miss_ttl_days * DAY)
+    index = ResolutionIndex()
+    if args.clear_cache:
+        cache.clear()
+        index.clear()
+        print("Cache cleared.\n")
+    if invalidating:
+        older_than = args.invalidate_older_than * DAY if args.invalidate_older_than is not None else None
+        dropped = cache.invalidate(artist=args.invalidate_artist, album=args.invalidate_album,
+                                   older_than=older_than, misses_only=args.invalidate_misses)
+        forgotten = index.invalidate(artist=args.invalidate_artist, album=args.invalidate_album)
+        print(f"Invalidated {dropped} cache entries and {forgotten} index entries.\n")
+
+    stats = create_stats(args)
+    policies = {}
     try:
-        first_date = datetime.strptime(albums[0]['date'], '%A %b %d, %Y %I:%M %p')
-        month_year = first_date.strftime('%B %Y')
-    except (KeyError, ValueError, IndexError):
-        month_year = datetime.now().strftime('%B %Y')
-
-    # Generate default playlist name if not provided
-    if not args.playlist_name:
-        playlist_name = f"Shibuya Hi-fi room, {month_year}"
-    else:
-        playlist_name = args.playlist_name
-
-    if args.dry_run:
-        print("=== DRY RUN MODE ===")
-        print(f"Playlist: '{playlist_name}'")
-        print(f"Albums: {len(albums)} | Cache: {cache.size()} entries")
-        print(f"Estimated time: ~{len(albums) * 2 // 60} minutes\n")
-
-        # Search for each album without creating playlist or adding tracks
-        found_count = 0
-        failed_albums = []
-        for i, album in enumerate(albums, 1):
-            album_name = album['album'][:40].ljust(40)
-            artist_name = album['artist'][:20].ljust(20)
-            print(f"[{i:2d}/{len(albums)}] {album_name} {artist_name}", end=" ", flush=True)
-            albums_found = search_album(sp, album['artist'], album['album'], cache, dry_run=True)
-            if albums_found:
-                album_id = albums_found[0]['id']
-                try:
-                    album_tracks = sp.album_tracks(album_id)
-                    track_count = len(album_tracks['items'])
-                    found_artist = albums_found[0]['artists'][0]['name']
-                    found_album = albums_found[0]['name']
-                    print(f"✓")
-                    found_count += 1
-                    if found_artist != album['artist'] or found_album != album['album']:
-                        print(f"     → Found: '{found_album}' by {found_artist}")
-                except Exception as e:
-                    print(f"✗")
-                    failed_albums.append((album['album'], album['artist'], "rate limited"))
+        if not (args.input_file or args.month):
+            return
+
+        # Only playlist changes need the user's login, so a plain dry run never asks for it
+        read_sp, sp = create_clients(writing=bool(args.sync or not args.dry_run), stats=stats)
+        if read_sp is None:
+            return
+
+        try:
+            if args.month:
+                schedule = store_schedule(args.month, args.as_of)
+                if schedule is None:
+                    return
+                # Journalled against the scrape's file, so --resume works either way
+                input_file, rows = schedule
             else:
-                print(f"✗")
-                failed_albums.append((album['album'], album['artist'], "not found"))
-            # Small delay between requests - respectful but not excessive
-            time.sleep(5)  # Development Mode requires longer delays
-
-        print(f"\n{'='*70}")
-        print(f"Result: {found_count}/{len(albums)} albums found")
-        if failed_albums:
-            print(f"\nFailed to find:")
-            for album_name, artist_name, reason in failed_albums:
-                print(f"  • {album_name} by {artist_name} ({reason})")
-        print(f"\nCache: {cache.size()} entries")
-
-    else:
-        # Create a new playlist
-        print(f"Creating playlist: '{playlist_name}'")
-        playlist_description = f"Shibuya Hifi Room, Seattle - {month_year} playlist"
-        playlist = sp.current_user_playlist_create(name=playlist_name,
-                                                   public=True, description=playlist_description)
-        print(f"✓ Playlist created\n")
-
-        # Search for each album and add the tracks to the playlist
-        added_count = 0
-        failed_albums = []
-        for i, album in enumerate(albums, 1):
-            album_name = album['album'][:40].ljust(40)
-            artist_name = album['artist'][:20].ljust(20)
-            print(f"[{i:2d}/{len(albums)}] {album_name} {artist_name}", end=" ", flush=True)
-            albums_found = search_album(sp, album['artist'], album['album'], cache)
-            if albums_found:
-                try:
-                    album_id = albums_found[0]['id']
-                    album_tracks = sp.album_tracks(album_id)
-                    track_uris = [track['uri'] for track in album_tracks['items']]
-                    sp.playlist_add_items(playlist_id=playlist['id'], items=track_uris)
-                    found_artist = albums_found[0]['artists'][0]['name']
-                    found_album = albums_found[0]['name']
-                    print(f"✓")
-                    added_count += 1
-                    if found_artist != album['artist'] or found_album != album['album']:
-                        print(f"     → Found: '{found_album}' by {found_artist}")
-                except Exception as e:
-                    print(f"✗")
-                    failed_albums.append((album['album'], album['artist'], "rate limited"))
-            else:
-                print(f"✗")
-                failed_albums.append((album['album'], album['artist'], "not found"))
-            # Small delay between requests
-            time.sleep(5)  # Development Mode requires longer delays
-
-        print(f"\n{'='*70}")
-        print(f"Complete: {added_count}/{len(albums)} albums added")
-        if failed_albums:
-            print(f"\nFailed to add:")
-            for album_name, artist_name, reason in failed_albums:
-                print(f"  • {album_name} by {artist_name} ({reason})")
-        print(f"\nPlaylist: https://open.spotify.com/playlist/{playlist['id']}")
-
+                input_file = args.input_file
+                rows = iter_playlist_data(input_file)
+            # Stream albums from the file; searches start with the first row
+            first_row, albums = peek(rows)
+        except Exception as e:
+            print(f"Error loading playlist data: {e}")
+            return
+
+        # Reads and writes split one app-wide rate limit; every call on
+        # one side shares its limiter and retry policy
+        read_policy, policy = create_policies(args.rate, args.read_rate, writing=sp is not None, quiet=args.dry_run)
+        policies.update(read=read_policy, write=policy)
+
+        # Determine month_year for description (always needed); a scrape
+        # can start with the last days of the previous month, so --month wins
+        if args.month:
+            month_year = datetime.strptime(args.month, '%Y-%m').strftime('%B %Y')
+        else:
+            month_year = playlist_month_year(first_row)
+        playlist_name = args.playlist_name or default_playlist_name(month_year)
+
+        if args.sync:
+            print(f"Syncing playlist {args.sync} with {input_file}")
+            if args.dry_run:
+                print("=== DRY RUN MODE ===")
+            print()
+            sync_playlist(sp, albums, args.sync, cache, index, policy, workers=args.workers, dry_run=args.dry_run,
+                          read_sp=read_sp, read_policy=read_policy)
+        elif args.dry_run:
+            dry_run_albums(read_sp, albums, playlist_name, cache, index, read_policy, workers=args.workers,
+                           rate=read_policy.limiter.max_rate, check_tracks=args.check_tracks)
+        else:
+            upload_albums(sp, albums, input_file, playlist_name, month_year, cache, index, policy,
+                          workers=args.workers, resume=args.resume, read_sp=read_sp, read_policy=read_policy)
+
+    finally:
+        if stats is not None:
+            stats.report(policies, cache, index, show=args.stats)
+        # Flush any batched cache writes
+        cache.close()
+        index.close()
 
 if __name__ == "__main__":
     main()
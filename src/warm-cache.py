@@ -0,0 +1,56 @@
+import argparse
+
+from shibuya.backfill import iter_file_rows, iter_schedule_files, unique_albums, warm_albums
+from shibuya.cli import add_api_arguments, create_clients, create_policies
+from shibuya.resolution_index import ResolutionIndex
+from shibuya.search_cache import SearchCache
+
+DEFAULT_DIRS = ['data', 'test/data']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pre-resolve every scheduled album into the search cache')
+    parser.add_argument('dirs', nargs='*', default=DEFAULT_DIRS,
+                        help=f"Directories of schedule CSVs (default: {' '.join(DEFAULT_DIRS)})")
+    add_api_arguments(parser, read_rate=False, stats=False)
+    parser.add_argument('--skip-tracks', action='store_true',
+                        help='Only resolve albums; don\'t fetch their track listings')
+    args = parser.parse_args()
+
+    cache = SearchCache(backend=args.cache_backend)
+    index = ResolutionIndex()
+    try:
+        files = list(iter_schedule_files(args.dirs))
+        todo, distinct, _ = unique_albums(iter_file_rows(files), index, cache)
+        print(f"{len(files)} files, {distinct} distinct albums, {len(todo)} to resolve")
+        if not todo:
+            print("Cache is already warm.")
+            return
+
+        # Only catalogue reads, so an app token is enough - no user login
+        sp, _ = create_clients(writing=False)
+        if sp is None:
+            return
+
+        policy, _ = create_policies(args.rate, writing=False)
+        found_count = 0
+        warmed = warm_albums(sp, todo, cache, index, policy, workers=args.workers, skip_tracks=args.skip_tracks)
+        for i, (album, ok) in enumerate(warmed, 1):
+            album_name = album['album'][:40].ljust(40)
+            artist_name = album['artist'][:20].ljust(20)
+            print(f"[{i:3d}/{len(todo)}] {album_name} {artist_name} {'✓' if ok else '✗'}")
+            if ok:
+                found_count += 1
+
+        print(f"\n{'='*70}")
+        print(f"Warmed: {found_count}/{len(todo)} albums resolved")
+        print(f"Cache: {cache.size()} entries | Index: {index.size()} albums")
+    except KeyboardInterrupt:
+        print("\nStopped. Finished lookups are saved; run again to continue.")
+    finally:
+        cache.close()
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import hashlib
+import os
+import shutil
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from shibuya.fetch import ConditionalFetcher, fetch_schedule
+from shibuya.schedule_parser import HOSTED_RE, html_to_lines
+
+SITE_DIR = Path(__file__).parent / "data" / "schedule-site"
+# Sessions on the fixture pages: index.html, then page-2.json and page-3.json behind "Load More"
+FIXTURE_ALBUMS = ['Kind of Blue', 'Laughing Stock', 'Ege Bamyasi', 'Ágætis byrjun']
+
+
+class ETagHandler(SimpleHTTPRequestHandler):
+    """Serve files with a content ETag, answering a matching If-None-Match with 304"""
+    def send_head(self):
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            path = os.path.join(path, 'index.html')
+        self.etag = None
+        if os.path.isfile(path):
+            self.etag = '"' + hashlib.sha1(Path(path).read_bytes()).hexdigest() + '"'
+            if self.headers.get('If-None-Match') == self.etag:
+                self.server.not_modified.append(self.path)
+                self.send_response(304)
+                self.end_headers()
+                return None
+        return super().send_head()
+
+    def end_headers(self):
+        if getattr(self, 'etag', None):
+            self.send_header('ETag', self.etag)
+        super().end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def site(tmp_path):
+    """A copy of the fixture site served over HTTP; yields (directory, schedule URL, server)"""
+    root = tmp_path / "site"
+    shutil.copytree(SITE_DIR, root)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), partial(ETagHandler, directory=str(root)))
+    server.not_modified = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield root, f"http://127.0.0.1:{server.server_address[1]}/hifi-schedule/", server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def sessions(html):
+    return sum(1 for line in html_to_lines(html) if HOSTED_RE.match(line))
+
+
+def test_follows_load_more_through_every_page(site, tmp_path):
+    _, url, _ = site
+    fetcher = ConditionalFetcher(cache_file=tmp_path / "fetch.json")
+    html, pages = fetch_schedule(url, fetcher)
+    assert pages == 3
+    assert sessions(html) == 5
+    lines = html_to_lines(html)
+    for album in FIXTURE_ALBUMS:
+        assert album in lines
+    assert (fetcher.downloaded, fetcher.not_modified) == (3, 0)
+
+
+def test_unchanged_pages_come_back_as_304(site, tmp_path):
+    _, url, server = site
+    cache_file = tmp_path / "fetch.json"
+    first = ConditionalFetcher(cache_file=cache_file)
+    html, _ = fetch_schedule(url, first)
+    first.save()
+
+    second = ConditionalFetcher(cache_file=cache_file)
+    again, pages = fetch_schedule(url, second)
+    assert again == html
+    assert pages == 3
+    assert (second.downloaded, second.not_modified) == (0, 3)
+    assert len(server.not_modified) == 3
+
+
+def test_changed_page_is_downloaded_again(site, tmp_path):
+    root, url, _ = site
+    cache_file = tmp_path / "fetch.json"
+    first = ConditionalFetcher(cache_file=cache_file)
+    fetch_schedule(url, first)
+    first.save()
+
+    page = root / "hifi-schedule" / "page-3.json"
+    page.write_text(page.read_text(encoding='utf-8').replace('Kind of Blue', 'Sketches of Spain'),
+                    encoding='utf-8')
+    second = ConditionalFetcher(cache_file=cache_file)
+    html, _ = fetch_schedule(url, second)
+    assert 'Sketches of Spain' in html
+    assert (second.downloaded, second.not_modified) == (1, 2)
+
+
+def test_follows_rel_next_links(site, tmp_path):
+    root, url, _ = site
+    schedule = root / "hifi-schedule"
+    page = schedule / "page-3.json"
+    page.write_text(page.read_text(encoding='utf-8').replace('"next": null', '"next": "page-4.html"'),
+                    encoding='utf-8')
+    (schedule / "page-4.html").write_text(
+        '<html><head><link rel="next" href="page-5.html"></head><body>'
+        '<article><p>Hosted By:</p><h3>Nina Simone</h3><h3>Pastel Blues</h3></article></body></html>',
+        encoding='utf-8')
+    (schedule / "page-5.html").write_text(
+        '<html><body><article><p>Hosted By:</p><h3>Can</h3><h3>Tago Mago</h3></article></body></html>',
+        encoding='utf-8')
+    html, pages = fetch_schedule(url, ConditionalFetcher(cache_file=tmp_path / "fetch.json"))
+    assert pages == 5
+    assert 'Pastel Blues' in html and 'Tago Mago' in html